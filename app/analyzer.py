@@ -0,0 +1,82 @@
+import re
+from functools import lru_cache
+
+from app.config import STEM_MEMO_SIZE
+
+# Runs of letters and digits; what word_tokenize + isalnum() kept, in one C-level pass
+TOKEN = re.compile(r"[^\W_]+")
+
+_MISSING = object()
+
+
+class Analyzer:
+    """
+    Spanish text analysis shared by ingestion (`content` column, BM25 index)
+    and queries, so both sides produce exactly the same terms: lowercase
+    alphanumeric tokens, stopwords removed, Snowball stems.
+    Stems are memoised per lowercased word; real text repeats the same few
+    thousand words, so almost every token is a dictionary hit.
+    Any change to the analysis needs `python -m app.ingest reanalyze`, so the
+    stored `content` is produced the same way as new queries.
+    """
+
+    def __init__(self, stopwords: set, stemmer, memo_size: int = STEM_MEMO_SIZE):
+        self.stopwords = stopwords
+        self.stemmer = stemmer
+        self.memo_size = memo_size
+        self._memo = {}  # lowercased word -> stem, or None for stopwords
+
+    def stem(self, word: str):
+        """
+        Stem of a lowercased word, or None if it is a stopword.
+        """
+        memo = self._memo
+        if word in memo:
+            return memo[word]
+        result = None if word in self.stopwords else self.stemmer.stem(word)
+        if len(memo) >= self.memo_size:
+            memo.clear()  # Bounded: start over rather than track recency
+        memo[word] = result
+        return result
+
+    def terms(self, text: str) -> list[str]:
+        """
+        Analysed terms of `text`, in order.
+        """
+        lookup, stem = self._memo.get, self.stem
+        terms = []
+        for word in TOKEN.findall(text.lower()):
+            term = lookup(word, _MISSING)
+            if term is _MISSING:
+                term = stem(word)
+            if term:
+                terms.append(term)
+        return terms
+
+    def analyze(self, text: str) -> str:
+        """
+        Analysed terms of `text` joined by spaces, as stored in `content`.
+        """
+        return " ".join(self.terms(text))
+
+    def analyze_many(self, texts) -> list[str]:
+        """
+        Batch form of `analyze` (e.g. every page of a document).
+        """
+        return [self.analyze(text) for text in texts]
+
+
+@lru_cache(maxsize=1)
+def get_analyzer() -> Analyzer:
+    """
+    The process-wide Spanish analyzer, built on first use; NLTK is only
+    imported here, so processes that never analyse text do not pay for it.
+    """
+    from nltk.corpus import stopwords
+    from nltk.stem import SnowballStemmer
+
+    try:
+        words = stopwords.words("spanish")
+    except LookupError as e:
+        raise RuntimeError("NLTK stopwords are not installed; run `python -m app.ingest setup`") from e
+    return Analyzer(set(words), SnowballStemmer("spanish"))
@@ -0,0 +1,109 @@
+import heapq
+from array import array
+from bisect import bisect_left
+
+from app.config import SessionLocal
+from app.generation import current_generation
+from sqlalchemy import select
+
+from app.models import Vocabulary
+from app.search import escape_like
+from app.snippets import fold
+
+# Upper bound for the `limit` of /autocomplete
+MAX_SUGGESTIONS = 20
+
+# Prefixes this short match a large slice of the vocabulary; their top
+# suggestions are precomputed when the index is built
+SHORT_PREFIX_LENGTH = 2
+
+
+class PrefixIndex:
+    """
+    Immutable in-memory autocomplete index: surface forms sorted by their
+    accent-folded key, with a parallel frequency array, searched with bisect.
+    """
+
+    def __init__(self, rows, generation: int):
+        entries = sorted((fold(term), term, freq) for term, freq in rows)
+        self.generation = generation
+        self.keys = [key for key, _, _ in entries]
+        self.terms = [term for _, term, _ in entries]
+        self.freqs = array("I", (freq for _, _, freq in entries))
+
+        self._short = {}
+        for position, key in enumerate(self.keys):
+            for length in range(1, SHORT_PREFIX_LENGTH + 1):
+                if len(key) < length:
+                    continue
+                heap = self._short.setdefault(key[:length], [])
+                item = (self.freqs[position], -position)
+                if len(heap) < MAX_SUGGESTIONS:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        for prefix, heap in self._short.items():
+            self._short[prefix] = [-position for _, position in sorted(heap, reverse=True)]
+
+    def suggest(self, prefix: str, limit: int = 5) -> list[str]:
+        """
+        Most frequent terms starting with `prefix`, ignoring case and accents
+        ("credito" finds "crédito").
+        """
+        key = fold(prefix.strip())
+        if not key:
+            return []
+        if len(key) <= SHORT_PREFIX_LENGTH:
+            positions = self._short.get(key, [])[:limit]
+        else:
+            start = bisect_left(self.keys, key)
+            end = bisect_left(self.keys, key + "\uffff", start)
+            positions = heapq.nlargest(limit, range(start, end), key=lambda p: (self.freqs[p], -p))
+        return [self.terms[position] for position in positions]
+
+
+def prefix_query(prefix: str, limit: int):
+    """
+    Database fallback of `PrefixIndex.suggest`: the most frequent vocabulary
+    terms starting with `prefix`. The LIKE prefix is served by the
+    text_pattern_ops index on vocabulary.term.
+    """
+    return (
+        select(Vocabulary.term)
+        .where(Vocabulary.term.like(f"{escape_like(prefix.strip().lower())}%"))
+        .order_by(Vocabulary.total_freq.desc(), Vocabulary.term)
+        .limit(limit)
+    )
+
+
+def load_index() -> PrefixIndex:
+    """
+    Build a PrefixIndex from the vocabulary table.
+    """
+    db = SessionLocal()
+    try:
+        generation = current_generation(db)
+        rows = db.query(Vocabulary.term, Vocabulary.total_freq).yield_per(10000)
+        return PrefixIndex(rows, generation)
+    finally:
+        db.close()
+
+
+# Current index; replaced as a whole so readers never see a partial update
+_index = None
+
+
+def get_index():
+    return _index
+
+
+def refresh_index(generation: int):
+    """
+    Reload the index if `generation` differs from the loaded one.
+    Used as the `on_change` callback of the generation watcher.
+    """
+    global _index
+    if _index is not None and _index.generation == generation:
+        return
+    _index = load_index()
+    print(f"Autocomplete index loaded: {len(_index.terms)} terms, generation {_index.generation}")
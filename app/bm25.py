@@ -0,0 +1,181 @@
+import datetime
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+from array import array
+from collections import defaultdict
+from itertools import accumulate
+
+from app.config import SessionLocal
+from app.models import PDFFile
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+MAGIC = b"BM25IDX1"
+# n_docs, total_tokens, then (offset, length) of every section
+HEADER = struct.Struct("=QQ" + "QQ" * 6)
+SECTIONS = ("doc_ids", "doc_lens", "doc_dates", "postings", "tfs", "vocab")
+TYPECODES = {"doc_ids": "I", "doc_lens": "I", "doc_dates": "i", "postings": "I", "tfs": "H"}
+
+
+def build_index(path: str):
+    """
+    Build the inverted index from the preprocessed `content` column and
+    write it atomically to `path`.
+    Posting lists are delta-encoded uint32 doc numbers with parallel uint16
+    term frequencies, laid out contiguously so they can be mmap'ed.
+    """
+    doc_ids, doc_lens, doc_dates = array("I"), array("I"), array("i")
+    term_postings = defaultdict(list)  # term -> [(doc number, tf)]
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(PDFFile.id, PDFFile.content, PDFFile.document_date)
+            .order_by(PDFFile.id)
+            .yield_per(100)
+        )
+        for pdf_id, content, document_date in rows:
+            doc = len(doc_ids)
+            counts = defaultdict(int)
+            tokens = content.split()
+            for token in tokens:
+                counts[token] += 1
+            for term, tf in counts.items():
+                term_postings[term].append((doc, min(tf, 0xFFFF)))
+            doc_ids.append(pdf_id)
+            doc_lens.append(len(tokens))
+            doc_dates.append(document_date.toordinal() if document_date else 0)
+    finally:
+        db.close()
+
+    postings, tfs, vocab = array("I"), array("H"), {}
+    for term in sorted(term_postings):
+        entries = term_postings[term]
+        vocab[term] = [len(postings), len(entries)]
+        previous = 0
+        for doc, tf in entries:
+            postings.append(doc - previous)
+            tfs.append(tf)
+            previous = doc
+
+    sections = {
+        "doc_ids": doc_ids.tobytes(),
+        "doc_lens": doc_lens.tobytes(),
+        "doc_dates": doc_dates.tobytes(),
+        "postings": postings.tobytes(),
+        "tfs": tfs.tobytes(),
+        "vocab": json.dumps(vocab, ensure_ascii=False).encode(),
+    }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        offset = len(MAGIC) + HEADER.size
+        layout = []
+        for name in SECTIONS:
+            offset += -offset % 8  # Keep every section 8-byte aligned
+            layout += [offset, len(sections[name])]
+            offset += len(sections[name])
+        f.write(MAGIC + HEADER.pack(len(doc_ids), sum(doc_lens), *layout))
+        for name, section_offset in zip(SECTIONS, layout[::2]):
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(sections[name])
+    os.replace(tmp_path, path)  # Readers never see a half-written file
+    print(f"BM25 index with {len(doc_ids)} documents and {len(vocab)} terms written to {path}")
+
+
+class BM25Index:
+    """
+    Read-only BM25 index over a memory-mapped file. Every uvicorn worker maps
+    the same file, so the posting lists live once in the page cache.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat_result = os.fstat(f.fileno())
+        # build_index replaces the file, so a rebuilt index has a new inode and mtime
+        self.identity = (stat_result.st_ino, stat_result.st_mtime_ns)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a BM25 index")
+
+        self.n_docs, total_tokens, *layout = HEADER.unpack_from(self._mmap, len(MAGIC))
+        self.avg_doc_len = total_tokens / self.n_docs if self.n_docs else 0.0
+
+        view = memoryview(self._mmap)
+        for name, offset, length in zip(SECTIONS, layout[::2], layout[1::2]):
+            section = view[offset:offset + length]
+            if name == "vocab":
+                self.vocab = json.loads(bytes(section))
+            else:
+                setattr(self, name, section.cast(TYPECODES[name]))
+
+    def score(self, terms: list[str]) -> dict[int, float]:
+        """
+        BM25 score of every document containing at least one of `terms`.
+        :return: {doc number: score}
+        """
+        scores = defaultdict(float)
+        for term in set(terms):
+            entry = self.vocab.get(term)
+            if not entry:
+                continue
+            start, df = entry
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            docs = accumulate(self.postings[start:start + df])
+            for doc, tf in zip(docs, self.tfs[start:start + df]):
+                norm = K1 * (1 - B + B * self.doc_lens[doc] / self.avg_doc_len)
+                scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, terms: list[str], limit: int, offset: int = 0,
+               start_date: datetime.date = None, end_date: datetime.date = None, after=None):
+        """
+        Top documents ordered by score DESC, document_date DESC NULLS LAST, id,
+        the same ordering /search uses for the database engines.
+        :param after: Optional decoded cursor (score, document_date, id); when
+            given, `offset` is ignored and rows after the cursor are returned.
+        :return: (total matches, [(pdf id, score, document_date)])
+        """
+        low = start_date.toordinal() if start_date else None
+        high = end_date.toordinal() if end_date else None
+
+        def sort_key(item):
+            doc, score = item
+            ordinal = self.doc_dates[doc]
+            # NULL dates (0) sort after every real date
+            return (-score, -ordinal if ordinal else 1, self.doc_ids[doc])
+
+        candidates = [
+            item for item in self.score(terms).items()
+            if (low is None or (self.doc_dates[item[0]] and self.doc_dates[item[0]] >= low))
+            and (high is None or (self.doc_dates[item[0]] and self.doc_dates[item[0]] <= high))
+        ]
+        total = len(candidates)
+
+        if after is not None:
+            last_score, last_date, last_id = after
+            last_key = (-last_score, -last_date.toordinal() if last_date else 1, last_id)
+            candidates = [item for item in candidates if sort_key(item) > last_key]
+            offset = 0
+
+        top = heapq.nsmallest(offset + limit, candidates, key=sort_key)[offset:]
+        return total, [
+            (
+                self.doc_ids[doc],
+                score,
+                datetime.date.fromordinal(self.doc_dates[doc]) if self.doc_dates[doc] else None,
+            )
+            for doc, score in top
+        ]
+
+
+if __name__ == "__main__":
+    from app.config import BM25_INDEX_PATH
+
+    build_index(BM25_INDEX_PATH)
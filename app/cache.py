@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """
+    Per-process LRU cache with a TTL. The number of entries is bounded, so
+    memory is bounded by `max_entries` times the size of one response.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache:
+    """
+    Cache shared by every process on the host: one JSON file per entry in
+    `directory` (ideally on tmpfs, e.g. /dev/shm, for short-lived entries).
+    The file mtime is the last access time, used for LRU pruning.
+    :param max_entries: Maximum number of entries, or None for no limit.
+    :param ttl: Seconds an entry stays valid, or None to never expire.
+    :param max_bytes: Optional bound on the total size of the entries.
+    """
+
+    # Prune once every this many writes instead of listing the directory each time
+    PRUNE_EVERY = 100
+
+    def __init__(self, directory: str, max_entries: int = None, ttl: int = None, max_bytes: int = None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                expires_at, stored_key, value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (expires_at is not None and expires_at < time.time()) or stored_key != key:
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def set(self, key: str, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([time.time() + self.ttl if self.ttl is not None else None, key, value], f)
+        os.replace(tmp_path, path)  # Readers never see a partial entry
+
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """
+        Remove expired entries and the least recently used ones above
+        `max_entries` or `max_bytes`.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+        oldest_allowed = time.time() - self.ttl if self.ttl is not None else None
+        total_bytes = 0
+        for position, (mtime, size, path) in enumerate(entries):
+            total_bytes += size
+            if (
+                (self.max_entries is not None and position >= self.max_entries)
+                or (self.max_bytes is not None and total_bytes > self.max_bytes)
+                or (oldest_allowed is not None and mtime < oldest_allowed)
+            ):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+def make_cache(backend: str, max_entries: int, ttl: int, directory: str = None):
+    """
+    Build the cache configured by `backend`: "memory", "files" or "none".
+    """
+    if backend == "memory":
+        return MemoryCache(max_entries, ttl)
+    if backend == "files":
+        return FileCache(directory, max_entries, ttl)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def cache_key(generation: int, **params) -> str:
+    """
+    Normalised key for a request: the query is lowercased and its whitespace
+    collapsed, and the ingestion generation is part of the key, so entries
+    from before an ingestion are never served again.
+    With exact_match the query is kept as typed: the raw fallback compares
+    it with `original_content` and `file_name` as is, so "Acta" and "acta"
+    can have different results.
+    """
+    query = params.get("query")
+    if query and not params.get("exact_match"):
+        params["query"] = " ".join(query.lower().split())
+    return json.dumps([generation, sorted(params.items())], ensure_ascii=False)
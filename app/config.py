@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -12,6 +12,107 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(DATABASE_URL)
+# How the API talks to the database: "sync" (psycopg2 sessions, each query
+# on the threadpool) or "async" (AsyncSession on asyncpg, no threadpool hop)
+DB_MODE = os.getenv("DB_MODE", "sync")
+if DB_MODE not in ("sync", "async"):
+    raise ValueError(f"Unknown DB_MODE: {DB_MODE}")
+# Defaults to DATABASE_URL with the asyncpg driver
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_url(DATABASE_URL).set(
+    drivername="postgresql+asyncpg"
+).render_as_string(hide_password=False)
+
+# Default engine for /search: "fts", "ilike" or "bm25" (in-process index)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "fts")
+# Memory-mapped BM25 index file, built with `python -m app.bm25`
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", "./bm25.idx")
+
+# fts mode: characters of original_content indexed in search_vector. PostgreSQL
+# rejects tsvectors over 1 MB, which text of distinct words reaches from about
+# 650k characters; the rest of a longer document is only searched by ilike/bm25
+SEARCH_VECTOR_MAX_CHARS = int(os.getenv("SEARCH_VECTOR_MAX_CHARS", "500000"))
+
+# ilike mode: search original_content when the stemmed content has no match
+SEARCH_RAW_FALLBACK = os.getenv("SEARCH_RAW_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+# How often workers check the ingestion generation (autocomplete reload, cache keys)
+GENERATION_POLL_SECONDS = int(os.getenv("GENERATION_POLL_SECONDS", "30"))
+
+# /search response cache: "memory" (per worker), "files" (shared by the workers
+# of a host through SEARCH_CACHE_DIR) or "none"
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1000"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", "/dev/shm/docusearch-cache")
+
+# PDFs served by /download and /view
+DOCUMENTS_DIR = os.getenv("DOCUMENTS_DIR", "./documents")
+# Browser cache lifetime of a served PDF, in seconds (revalidated with ETag after)
+FILE_CACHE_MAX_AGE = int(os.getenv("FILE_CACHE_MAX_AGE", "3600"))
+# Per-worker cache of file name -> resolved path, so repeat requests skip the
+# path resolution; the file itself is still stat'ed on every request
+FILE_PATH_CACHE_SIZE = int(os.getenv("FILE_PATH_CACHE_SIZE", "10000"))
+FILE_PATH_CACHE_TTL = int(os.getenv("FILE_PATH_CACHE_TTL", "300"))
+
+# Ingestion: worker processes for extraction (1 = sequential) and rows per flush
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+
+# Distinct words whose stems the analyzer keeps memoised per process
+STEM_MEMO_SIZE = int(os.getenv("STEM_MEMO_SIZE", "100000"))
+
+# Document dates are searched in the first and last characters of the text
+# (letterhead, signature); both 0 searches the whole document
+DATE_LEADING_CHARS = int(os.getenv("DATE_LEADING_CHARS", "5000"))
+DATE_TRAILING_CHARS = int(os.getenv("DATE_TRAILING_CHARS", "2000"))
+
+# Text extractors tried in order for pages still without text:
+# "pymupdf" (fast default), "pdfminer" and "ocr"
+EXTRACTOR_CHAIN = os.getenv("EXTRACTOR_CHAIN", "pymupdf,ocr")
+# Pages extracted and preprocessed at a time; bounds memory on huge documents
+EXTRACT_PAGE_WINDOW = int(os.getenv("EXTRACT_PAGE_WINDOW", "16"))
+
+# OCR of pages without a text layer: render resolution, Tesseract language
+# and concurrent Tesseract processes per document
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "spa")
+OCR_THREADS = int(os.getenv("OCR_THREADS", "2"))
+# On-disk OCR results keyed by page bitmap; empty OCR_CACHE_DIR disables it
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "./ocr_cache")
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(1024 ** 3)))
+
+# Connection pool, shared by the sync and async engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds to wait for a free connection before failing the request
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycle connections older than this many seconds (-1 never)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Per-endpoint statement_timeout in milliseconds (0 disables); slower queries
+# are cancelled by PostgreSQL and the request answers 503
+SEARCH_STATEMENT_TIMEOUT_MS = int(os.getenv("SEARCH_STATEMENT_TIMEOUT_MS", "10000"))
+AUTOCOMPLETE_STATEMENT_TIMEOUT_MS = int(os.getenv("AUTOCOMPLETE_STATEMENT_TIMEOUT_MS", "2000"))
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# Async engine for the API handlers; only built in async mode, so asyncpg
+# is not needed otherwise
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **POOL_OPTIONS)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
\ No newline at end of file
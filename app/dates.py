@@ -0,0 +1,114 @@
+import datetime
+import re
+from typing import NamedTuple
+
+from app.config import DATE_LEADING_CHARS, DATE_TRAILING_CHARS
+
+# Diccionario de conversión de nombres de meses a números
+MONTHS = {
+    "ENERO": 1, "FEBRERO": 2, "MARZO": 3, "ABRIL": 4, "MAYO": 5, "JUNIO": 6,
+    "JULIO": 7, "AGOSTO": 8, "SEPTIEMBRE": 9, "SETIEMBRE": 9, "OCTUBRE": 10, "NOVIEMBRE": 11, "DICIEMBRE": 12
+}
+
+# Diccionario de conversión de números escritos a enteros
+NUMBER_WORDS = {
+    "PRIMERO": 1, "UNO": 1, "DOS": 2, "TRES": 3, "CUATRO": 4, "CINCO": 5, "SEIS": 6, "SIETE": 7,
+    "OCHO": 8, "NUEVE": 9, "DIEZ": 10, "ONCE": 11, "DOCE": 12, "TRECE": 13,
+    "CATORCE": 14, "QUINCE": 15, "DIECISÉIS": 16, "DIECISIETE": 17, "DIECIOCHO": 18,
+    "DIECINUEVE": 19, "VEINTE": 20, "VEINTIUNO": 21, "VEINTIDÓS": 22, "VEINTITRÉS": 23,
+    "VEINTICUATRO": 24, "VEINTICINCO": 25, "VEINTISÉIS": 26, "VEINTISIETE": 27,
+    "VEINTIOCHO": 28, "VEINTINUEVE": 29, "TREINTA": 30, "TREINTA Y UNO": 31
+}
+
+_UNACCENT = str.maketrans("ÁÉÍÓÚ", "AEIOU")
+# Number words are also accepted without accents ("DIECISEIS")
+NUMBER_WORDS.update({word.translate(_UNACCENT): value for word, value in list(NUMBER_WORDS.items())})
+
+
+def _alternation(words) -> str:
+    # Longest first, so "TREINTA Y UNO" wins over "TREINTA"
+    return "|".join(re.escape(word).replace(r"\ ", r"\s+") for word in sorted(words, key=len, reverse=True))
+
+
+# One pattern for every format, compiled once:
+#   "5 DE MARZO DE 2024", "CINCO DE MARZO DEL DOS MIL VEINTICUATRO", "1 DE ENERO DE DOS MIL"
+DATE_PATTERN = re.compile(
+    rf"\b(?P<day>\d{{1,2}}|{_alternation(NUMBER_WORDS)})\s+DE\s+(?P<month>{_alternation(MONTHS)})\s+DEL?\s+"
+    rf"(?:(?P<year>\d{{4}})|DOS\s+MIL(?:\s+(?P<year_text>{_alternation(NUMBER_WORDS)}))?)\b",
+    re.IGNORECASE,
+)
+
+
+class DateMatch(NamedTuple):
+    date: datetime.date
+    # 1.0 for a written-out year, lower when the year had to be assumed
+    confidence: float
+    # Offsets of the matched text in the document
+    start: int
+    end: int
+
+
+def _number(word: str) -> int:
+    return int(word) if word.isdigit() else NUMBER_WORDS.get(" ".join(word.upper().split()))
+
+
+def _parse(match: re.Match, offset: int):
+    day = _number(match["day"])
+    month = MONTHS[match["month"].upper()]
+    if match["year"]:
+        year, confidence = int(match["year"]), 1.0
+    elif match["year_text"]:
+        year, confidence = 2000 + _number(match["year_text"]), 0.9
+    else:
+        year, confidence = 2000, 0.5  # Solo "DOS MIL": asumir 2000
+    try:
+        date = datetime.date(year=year, month=month, day=day)
+    except ValueError:
+        return None  # e.g. "31 DE FEBRERO"
+    return DateMatch(date, confidence, offset + match.start(), offset + match.end())
+
+
+def date_windows(text: str, leading: int = DATE_LEADING_CHARS, trailing: int = DATE_TRAILING_CHARS):
+    """
+    The parts of a document where its date is written: the first `leading`
+    and last `trailing` characters (letterheads and signatures).
+    Both set to 0 searches the whole text.
+    :return: [(offset, text)]
+    """
+    if (not leading and not trailing) or len(text) <= leading + trailing:
+        return [(0, text)]
+    windows = [(0, text[:leading])] if leading else []
+    if trailing:
+        windows.append((len(text) - trailing, text[-trailing:]))
+    return windows
+
+
+def find_date_in_windows(windows) -> DateMatch:
+    """
+    First valid date in `windows`, as returned by `date_windows`.
+    """
+    for offset, window in windows:
+        for match in DATE_PATTERN.finditer(window):
+            result = _parse(match, offset)
+            if result:
+                return result
+    return None
+
+
+def find_date(text: str, leading: int = DATE_LEADING_CHARS, trailing: int = DATE_TRAILING_CHARS) -> DateMatch:
+    """
+    Date of a document, searched in a single pass over its leading and
+    trailing windows.
+    :return: DateMatch with the date, a confidence and the source span, or None.
+    """
+    if not text:
+        return None
+    return find_date_in_windows(date_windows(text, leading, trailing))
+
+
+def extract_date_from_text(text: str) -> datetime.date:
+    """
+    Date of a document, or None if no date was found; see `find_date`.
+    """
+    result = find_date(text)
+    return result.date if result else None
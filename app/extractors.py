@@ -0,0 +1,240 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from functools import lru_cache
+from itertools import islice
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+from app.cache import FileCache
+from app.config import (
+    EXTRACTOR_CHAIN, EXTRACT_PAGE_WINDOW, OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES, OCR_DPI, OCR_LANGUAGE, OCR_THREADS,
+)
+
+
+def ordered_results(executor, fn, items, window: int):
+    """
+    Like executor.map, but keeps at most `window` tasks in flight so finished
+    results (full document text) do not pile up behind a slow item.
+    Results are yielded in the order of `items`.
+    """
+    pending = deque()
+    items = iter(items)
+    for item in islice(items, window):
+        pending.append(executor.submit(fn, item))
+    while pending:
+        result = pending.popleft().result()
+        for item in islice(items, 1):
+            pending.append(executor.submit(fn, item))
+        yield result
+
+
+class PDFDocument:
+    """
+    A PDF opened once and shared by every extractor of a chain; PyMuPDF and
+    OCR work on the same parsed document, and pdfminer's parse is built on
+    first use and kept for the following page windows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.doc = fitz.open(path)
+        self._pdfminer_file = None
+        self._pdfminer = None
+
+    @property
+    def page_count(self) -> int:
+        return self.doc.page_count
+
+    def pdfminer(self):
+        """
+        pdfminer's pages of the document and a layout interpreter for them.
+        :return: (pages, interpreter, device)
+        """
+        if self._pdfminer is None:
+            # Imported here: pdfminer is only loaded when it is part of the chain
+            from pdfminer.converter import PDFPageAggregator
+            from pdfminer.layout import LAParams
+            from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+            from pdfminer.pdfpage import PDFPage
+
+            self._pdfminer_file = open(self.path, "rb")
+            # Page objects only; content streams are decoded when a page is processed
+            pages = list(PDFPage.get_pages(self._pdfminer_file))
+            resource_manager = PDFResourceManager(caching=True)
+            device = PDFPageAggregator(resource_manager, laparams=LAParams())
+            self._pdfminer = pages, PDFPageInterpreter(resource_manager, device), device
+        return self._pdfminer
+
+    def close(self):
+        self.doc.close()
+        if self._pdfminer_file is not None:
+            self._pdfminer_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Extractors: (document, page numbers) -> text of each of those pages, in order
+
+def extract_pymupdf(document: PDFDocument, page_numbers: list[int]):
+    """
+    Text layer through PyMuPDF; several times faster than pdfminer.
+    """
+    for page_num in page_numbers:
+        yield document.doc[page_num].get_text("text")
+
+
+def extract_pdfminer(document: PDFDocument, page_numbers: list[int]):
+    """
+    Text layer through pdfminer's layout analysis; slower, but reads some
+    PDFs PyMuPDF gets nothing from. The document is parsed once, and only
+    the requested pages are laid out.
+    """
+    from pdfminer.layout import LTTextContainer
+
+    pages, interpreter, device = document.pdfminer()
+    for page_num in page_numbers:
+        if page_num >= len(pages):
+            yield ""  # pdfminer found fewer pages than PyMuPDF
+            continue
+        interpreter.process_page(pages[page_num])
+        layout = device.get_result()
+        yield "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+
+
+def render_page(page, dpi: int) -> Image.Image:
+    """
+    Render a PDF page to a grayscale PIL image in-process with PyMuPDF.
+    """
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+@lru_cache(maxsize=1)
+def get_ocr_cache():
+    """
+    Persistent OCR results, shared by every ingestion process; None when
+    OCR_CACHE_DIR is empty.
+    """
+    if not OCR_CACHE_DIR:
+        return None
+    return FileCache(OCR_CACHE_DIR, max_bytes=OCR_CACHE_MAX_BYTES)
+
+
+@lru_cache(maxsize=1)
+def tesseract_version() -> str:
+    return str(pytesseract.get_tesseract_version())
+
+
+def ocr_cache_key(image: Image.Image) -> str:
+    """
+    Identify an OCR result by the rendered bitmap and the Tesseract setup, so
+    a new language or Tesseract version never reuses stale text.
+    """
+    digest = hashlib.sha256(image.tobytes())
+    return f"{digest.hexdigest()}:{image.width}x{image.height}:{OCR_LANGUAGE}:{tesseract_version()}"
+
+
+def ocr_image(image: Image.Image) -> str:
+    """
+    OCR a page image, reusing the cached text when the same bitmap was
+    already recognised (re-ingestion, moved or renamed files).
+    """
+    ocr_cache = get_ocr_cache()
+    key = ocr_cache_key(image) if ocr_cache is not None else None
+    if key is not None:
+        cached = ocr_cache.get(key)
+        if cached is not None:
+            return cached
+
+    # Tesseract runs as a subprocess, so threads give real parallelism
+    text = pytesseract.image_to_string(image, lang=OCR_LANGUAGE)
+    if key is not None:
+        ocr_cache.set(key, text)
+    return text
+
+
+def extract_ocr(document: PDFDocument, page_numbers: list[int], dpi: int = OCR_DPI, threads: int = OCR_THREADS):
+    """
+    OCR the pages, rendered with PyMuPDF and recognised in a thread pool;
+    only a few rendered pages are held in memory at a time.
+    """
+    images = (render_page(document.doc[page_num], dpi) for page_num in page_numbers)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        yield from ordered_results(executor, ocr_image, images, threads * 2)
+
+
+EXTRACTORS = {
+    "pymupdf": extract_pymupdf,
+    "pdfminer": extract_pdfminer,
+    "ocr": extract_ocr,
+}
+
+
+def get_chain(names: str = EXTRACTOR_CHAIN) -> list:
+    """
+    Extractors named in a comma-separated chain, e.g. "pymupdf,pdfminer,ocr".
+    """
+    chain = []
+    for name in names.split(","):
+        name = name.strip()
+        if name not in EXTRACTORS:
+            raise ValueError(f"Unknown text extractor: {name}")
+        chain.append(EXTRACTORS[name])
+    return chain
+
+
+def iter_pages(file_path: str, chain: str = EXTRACTOR_CHAIN, window: int = EXTRACT_PAGE_WINDOW):
+    """
+    Yield the text of every page of a PDF, in page order, through a fallback
+    chain: every extractor only sees the pages the previous ones returned no
+    text for, so OCR runs only on pages without a text layer.
+    An error in an extractor hands its pages to the next one; an error in
+    the last extractor of the chain is raised, so the file is marked failed
+    and can be retried instead of being indexed without those pages.
+    Pages are processed `window` at a time, so memory stays bounded however
+    long the document is.
+    :param file_path: Path to the PDF file.
+    :param chain: Comma-separated extractor names, tried in order.
+    :param window: Pages extracted together (the OCR thread pool works within a window).
+    """
+    extractors = get_chain(chain)
+    with PDFDocument(file_path) as document:
+        for first in range(0, document.page_count, window):
+            page_numbers = range(first, min(first + window, document.page_count))
+            pages = dict.fromkeys(page_numbers, "")
+            for extractor in extractors:
+                missing = [page_num for page_num, text in pages.items() if not text.strip()]
+                if not missing:
+                    break
+                try:
+                    for page_num, text in zip(missing, extractor(document, missing)):
+                        pages[page_num] = text
+                except Exception as e:
+                    if extractor is extractors[-1]:
+                        # Nothing else can read these pages: fail the document rather
+                        # than index it without them (it would then count as unchanged)
+                        pages_left = [page_num + 1 for page_num, text in pages.items() if not text.strip()]
+                        raise RuntimeError(
+                            f"{extractor.__name__} failed on pages {pages_left} of {file_path}: {e}"
+                        ) from e
+                    # Keep what was extracted so far and let the next extractor try
+                    print(f"Error extracting text from {file_path} with {extractor.__name__}: {e}")
+            yield from pages.values()
+
+
+def extract_text_from_pdf(file_path: str, chain: str = EXTRACTOR_CHAIN) -> str:
+    """
+    Extract the whole text of a PDF, see `iter_pages`.
+    :return: The text of every page, in page order.
+    """
+    text = "\n".join(iter_pages(file_path, chain)).strip()
+    if not text:
+        print(f"No text extracted from {file_path}")
+    return text
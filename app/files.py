@@ -0,0 +1,90 @@
+import os
+import stat
+from email.utils import parsedate_to_datetime
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from app.cache import MemoryCache
+from app.config import DOCUMENTS_DIR, FILE_CACHE_MAX_AGE, FILE_PATH_CACHE_SIZE, FILE_PATH_CACHE_TTL
+
+DOCUMENTS_ROOT = os.path.realpath(DOCUMENTS_DIR)
+
+# file name -> absolute path inside DOCUMENTS_ROOT; a hit skips realpath() and
+# the traversal check, which walk every component of the path
+path_cache = MemoryCache(FILE_PATH_CACHE_SIZE, FILE_PATH_CACHE_TTL)
+
+# Headers a 304 must repeat from the full response
+NOT_MODIFIED_HEADERS = ("etag", "last-modified", "cache-control")
+
+
+def resolve_document(file_name: str):
+    """
+    Absolute path and stat of a document. Only the path is cached: the stat
+    is taken on every request, so a PDF replaced in place is never served
+    with the size and ETag of the previous version.
+    :raises HTTPException: 404 if the file does not exist or is outside DOCUMENTS_DIR.
+    """
+    path = cached = path_cache.get(file_name)
+    if path is None:
+        path = os.path.realpath(os.path.join(DOCUMENTS_ROOT, file_name))
+        if os.path.commonpath([path, DOCUMENTS_ROOT]) != DOCUMENTS_ROOT:
+            raise HTTPException(status_code=404, detail="File not found")
+
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if cached is None:
+        # Cached only once the file exists, so unknown names do not fill the cache
+        path_cache.set(file_name, path)
+    return path, stat_result
+
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """
+    Conditional GET: If-None-Match takes precedence over If-Modified-Since.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def pdf_response(request: Request, file_name: str, inline: bool) -> Response:
+    """
+    Serve a PDF with validators and caching headers.
+    FileResponse answers Range/If-Range requests with 206 (PDF.js progressive
+    loading) and derives a strong ETag and Last-Modified from the stat;
+    unchanged files answer 304 without opening the file.
+    """
+    path, stat_result = resolve_document(file_name)
+
+    headers = {"Cache-Control": f"public, max-age={FILE_CACHE_MAX_AGE}"}
+    if inline:
+        headers["Content-Disposition"] = "inline"
+    response = FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=None if inline else file_name,
+        headers=headers,
+        stat_result=stat_result,
+    )
+
+    if is_not_modified(request, response.headers["etag"], stat_result.st_mtime):
+        return Response(
+            status_code=304,
+            headers={name: response.headers[name] for name in NOT_MODIFIED_HEADERS if name in response.headers},
+        )
+    return response
@@ -0,0 +1,66 @@
+import threading
+import time
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from app.models import IngestionState
+
+
+def current_generation(db) -> int:
+    """
+    Current ingestion generation; 0 if nothing has been ingested yet.
+    """
+    generation = db.query(IngestionState.generation).filter(IngestionState.id == 1).scalar()
+    return generation or 0
+
+
+def bump_generation(db):
+    """
+    Increment the ingestion generation in the caller's transaction, so
+    in-process indexes and caches notice the new data once it commits.
+    """
+    statement = insert(IngestionState).values(id=1, generation=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=[IngestionState.id],
+        set_={"generation": IngestionState.generation + 1, "updated_at": func.now()},
+    )
+    db.execute(statement)
+
+
+# Last generation seen by the watcher thread; None until it has run once
+_latest = None
+
+
+def latest_generation():
+    """
+    Generation last observed by `start_watcher`, without a database round-trip.
+    None if the watcher is not running.
+    """
+    return _latest
+
+
+def start_watcher(interval: int, on_change=None):
+    """
+    Poll the ingestion generation every `interval` seconds in a daemon thread.
+    :param on_change: Optional callable receiving the new generation; also
+        called once with the initial value.
+    """
+    from app.config import SessionLocal
+
+    def run():
+        global _latest
+        while True:
+            try:
+                db = SessionLocal()
+                try:
+                    generation = current_generation(db)
+                finally:
+                    db.close()
+                if generation != _latest:
+                    if on_change is not None:
+                        on_change(generation)
+                    _latest = generation
+            except Exception as e:
+                print(f"Error checking ingestion generation: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=run, name="generation-watcher", daemon=True).start()
@@ -0,0 +1,95 @@
+# Ingestion commands, kept out of the API process (which never imports the
+# PDF, OCR or NLTK stack):
+#
+#   python -m app.ingest setup                    # once per host: NLTK data
+#   python -m app.ingest run ./documents          # ingest new and changed PDFs
+#   python -m app.ingest backfill-dates
+#   python -m app.ingest rebuild-vocabulary
+#   python -m app.ingest rebuild-bm25             # API workers remap it on their next query
+#   python -m app.ingest reanalyze                # after analyzer changes: recompute `content`
+import argparse
+import os
+
+from app.config import BM25_INDEX_PATH, INGEST_BATCH_SIZE, INGEST_WORKERS
+
+# NLTK resources used by the analyzer
+NLTK_RESOURCES = {"stopwords": "corpora/stopwords"}
+
+
+def setup_nltk():
+    """
+    Download the NLTK data the analyzer needs, only if it is missing.
+    """
+    import nltk
+
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+            print(f"NLTK {name}: already installed")
+        except LookupError:
+            if not nltk.download(name):
+                raise RuntimeError(f"Could not download NLTK {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.ingest", description="DocuSearch ingestion")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("setup", help="Download the NLTK data (once per host)")
+
+    run = commands.add_parser("run", help="Ingest the PDFs of a directory")
+    run.add_argument("pdf_directory")
+    run.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    run.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    run.add_argument("--run-id", type=int, help="Resume this ingestion run")
+    run.add_argument("--retry-failed", action="store_true", help="Retry the files that failed in the resumed run")
+    run.add_argument("--allow-empty", action="store_true",
+                     help="Remove the indexed documents of the directory even if it has no PDFs left")
+    run.add_argument("--skip-bm25", action="store_true", help="Do not rebuild an existing BM25 index after the run")
+
+    backfill = commands.add_parser("backfill-dates", help="Extract missing document dates")
+    backfill.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    backfill.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+
+    commands.add_parser("rebuild-vocabulary", help="Rebuild the autocomplete vocabulary")
+
+    reanalyze = commands.add_parser("reanalyze", help="Recompute the analysed content from the original text")
+    reanalyze.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    reanalyze.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+
+    bm25 = commands.add_parser("rebuild-bm25", help="Rebuild the BM25 index file")
+    bm25.add_argument("--path", default=BM25_INDEX_PATH)
+
+    args = parser.parse_args(argv)
+    if args.command == "setup":
+        setup_nltk()
+        return
+
+    from app import bm25, utils
+
+    if args.command == "run":
+        summary = utils.populate_database_from_pdfs(
+            args.pdf_directory, args.workers, args.batch_size, run_id=args.run_id, retry_failed=args.retry_failed,
+            allow_empty=args.allow_empty,
+        )
+        print(summary)
+        if summary["error"]:
+            raise SystemExit(1)
+        # Keep an existing index in step with the documents just committed
+        if not args.skip_bm25 and os.path.exists(BM25_INDEX_PATH):
+            bm25.build_index(BM25_INDEX_PATH)
+    elif args.command == "backfill-dates":
+        utils.backfill_document_dates(args.workers, args.batch_size)
+    elif args.command == "rebuild-vocabulary":
+        utils.rebuild_vocabulary()
+    elif args.command == "reanalyze":
+        utils.reanalyze_content(args.workers, args.batch_size)
+        # The BM25 index is built from `content`
+        if os.path.exists(BM25_INDEX_PATH):
+            bm25.build_index(BM25_INDEX_PATH)
+    elif args.command == "rebuild-bm25":
+        bm25.build_index(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from sqlalchemy import text
+from app.config import engine, Base, SEARCH_VECTOR_MAX_CHARS
+import app.models  # noqa: F401  (registers the tables on Base.metadata)
+
+# Extensions required by the model indexes, created before the tables
+EXTENSIONS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+]
+
+# Idempotent DDL applied on top of the tables created by Base.metadata.create_all.
+# Each statement can be re-run safely against an existing database.
+MIGRATIONS = [
+    # Full-text search column (spanish config) and its GIN index; bounded
+    # like app.models.build_search_vector, so one huge document cannot
+    # abort the whole migration
+    "ALTER TABLE pdf_files ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    UPDATE pdf_files
+    SET search_vector =
+        setweight(to_tsvector('spanish', coalesce(file_name, '')), 'A') ||
+        setweight(to_tsvector('spanish', left(coalesce(original_content, ''), {SEARCH_VECTOR_MAX_CHARS})), 'B')
+    WHERE search_vector IS NULL
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_pdf_files_search_vector ON pdf_files USING gin (search_vector)",
+    # Trigram indexes so ILIKE '%term%' can use a bitmap index scan
+    "CREATE INDEX IF NOT EXISTS ix_pdf_files_content_trgm ON pdf_files USING gin (content gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_pdf_files_original_content_trgm ON pdf_files USING gin (original_content gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_pdf_files_file_name_trgm ON pdf_files USING gin (file_name gin_trgm_ops)",
+    # File manifest for incremental indexing
+    "ALTER TABLE pdf_files ADD COLUMN IF NOT EXISTS file_size bigint",
+    "ALTER TABLE pdf_files ADD COLUMN IF NOT EXISTS file_mtime double precision",
+    "ALTER TABLE pdf_files ADD COLUMN IF NOT EXISTS content_hash varchar(64)",
+]
+
+
+def run_migrations():
+    """
+    Create extensions and missing tables, then apply every statement in
+    MIGRATIONS inside a single transaction.
+    """
+    with engine.begin() as conn:
+        for statement in EXTENSIONS:
+            conn.execute(text(statement))
+        Base.metadata.create_all(bind=conn)
+        for statement in MIGRATIONS:
+            conn.execute(text(statement))
+    print("Migrations applied successfully!")
+
+
+if __name__ == "__main__":
+    run_migrations()
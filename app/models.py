@@ -1,6 +1,27 @@
-from sqlalchemy import Column, Date, Integer, String, Text, DateTime, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Date, Float, ForeignKey, Index, Integer, String, Text, DateTime, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
-from app.config import Base
+from app.config import Base, SEARCH_VECTOR_MAX_CHARS
+
+# Text search configuration used to build and query the tsvector column
+SEARCH_CONFIG = "spanish"
+
+
+def build_search_vector(file_name, original_content):
+    """
+    SQL expression that builds the weighted tsvector for a document.
+    The file name gets weight A and the raw text weight B; only the first
+    SEARCH_VECTOR_MAX_CHARS characters of the text are indexed, so huge
+    documents stay under PostgreSQL's 1 MB tsvector limit.
+    """
+    text = func.left(func.coalesce(original_content, ""), SEARCH_VECTOR_MAX_CHARS)
+    return func.setweight(
+        func.to_tsvector(SEARCH_CONFIG, func.coalesce(file_name, "")), "A"
+    ).op("||")(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, text), "B")
+    )
+
 
 class PDFFile(Base):
     __tablename__ = "pdf_files"
@@ -8,11 +29,66 @@ class PDFFile(Base):
     id = Column(Integer, primary_key=True, index=True)
     file_name = Column(String, nullable=False, index=True)
     file_path = Column(String, nullable=False, unique=True)  # Enforce uniqueness
-    content = Column(Text, nullable=False)  # Processed content (stemmed/cleaned)
-    original_content = Column(Text, nullable=False)  # Raw, unprocessed text
+    # Large text columns are deferred: listing queries only load metadata,
+    # the text is fetched explicitly when it is needed (snippets, backfill)
+    content = deferred(Column(Text, nullable=False))  # Processed content (stemmed/cleaned)
+    original_content = deferred(Column(Text, nullable=False))  # Raw, unprocessed text
     upload_date = Column(DateTime, server_default=func.now())
     document_date = Column(Date, nullable=True)  # New column for document date
+    search_vector = deferred(Column(TSVECTOR, nullable=True))  # Full-text index over file_name + original_content
+    # Manifest used by incremental indexing to detect changed files
+    file_size = Column(BigInteger, nullable=True)
+    file_mtime = Column(Float, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the file bytes
 
 
     # Add a unique constraint explicitly (optional if `unique=True` is already used)
-    __table_args__ = (UniqueConstraint('file_path', name='_file_path_uc'),)
+    __table_args__ = (
+        UniqueConstraint('file_path', name='_file_path_uc'),
+        Index('ix_pdf_files_search_vector', 'search_vector', postgresql_using='gin'),
+        # Trigram indexes (pg_trgm) for ILIKE '%term%' substring search
+        Index('ix_pdf_files_content_trgm', 'content', postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}),
+        Index('ix_pdf_files_original_content_trgm', 'original_content', postgresql_using='gin', postgresql_ops={'original_content': 'gin_trgm_ops'}),
+        Index('ix_pdf_files_file_name_trgm', 'file_name', postgresql_using='gin', postgresql_ops={'file_name': 'gin_trgm_ops'}),
+    )
+
+
+class Vocabulary(Base):
+    __tablename__ = "vocabulary"
+
+    term = Column(String, primary_key=True)  # Lowercased surface form from original_content
+    doc_freq = Column(Integer, nullable=False, default=0)  # Documents containing the term
+    total_freq = Column(Integer, nullable=False, default=0)  # Occurrences across the corpus
+
+    # Prefix lookups (LIKE 'abc%') regardless of the database collation
+    __table_args__ = (
+        Index('ix_vocabulary_term_pattern', 'term', postgresql_ops={'term': 'text_pattern_ops'}),
+    )
+
+
+class IngestionState(Base):
+    __tablename__ = "ingestion_state"
+
+    id = Column(Integer, primary_key=True)  # Single row, id = 1
+    generation = Column(Integer, nullable=False, default=0)  # Bumped whenever ingestion commits new data
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class IngestionRun(Base):
+    __tablename__ = "ingestion_runs"
+
+    id = Column(Integer, primary_key=True)
+    directory = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="running")  # running, done, failed
+    started_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+
+class IngestionRunFile(Base):
+    __tablename__ = "ingestion_run_files"
+
+    run_id = Column(Integer, ForeignKey("ingestion_runs.id", ondelete="CASCADE"), primary_key=True)
+    file_path = Column(String, primary_key=True)
+    status = Column(String, nullable=False, default="pending")  # pending, done, failed
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
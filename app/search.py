@@ -0,0 +1,144 @@
+import base64
+import datetime
+import json
+import string
+from functools import lru_cache
+from sqlalchemy import and_, case, cast, or_
+from app.analyzer import get_analyzer
+from app.models import PDFFile
+
+# Columns matched by substring (ILIKE '%term%'); each one has a gin_trgm_ops index
+SUBSTRING_COLUMNS = (PDFFile.content, PDFFile.original_content, PDFFile.file_name)
+# Analysed query terms (stems) are matched against the stemmed text first,
+# raw terms against the original text only as a fallback
+STEMMED_COLUMNS = (PDFFile.content, PDFFile.file_name)
+RAW_COLUMNS = (PDFFile.original_content, PDFFile.file_name)
+
+# Stripped from raw query words before the stopword check ("el," -> "el")
+QUERY_PUNCTUATION = string.punctuation + "¿¡«»"
+
+# pg_trgm can only narrow an index scan when the pattern holds a full trigram
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+
+def escape_like(term: str) -> str:
+    """
+    Escape LIKE wildcards so user input is matched literally.
+    """
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@lru_cache(maxsize=1024)
+def analyze_query(query: str):
+    """
+    Terms of a user query, without stopwords and duplicates.
+    :return: (stems, raw terms); stems come from the same analyzer as the
+        `content` column, raw terms are the remaining words lowercased and
+        without surrounding punctuation ("¿Universidad," -> "universidad").
+    """
+    analyzer = get_analyzer()
+    stems = tuple(dict.fromkeys(analyzer.terms(query)))
+    words = (word.lower().strip(QUERY_PUNCTUATION) for word in query.split())
+    raw_terms = tuple(dict.fromkeys(word for word in words if word and word not in analyzer.stopwords))
+    return stems, raw_terms
+
+
+def websearch_terms(query: str) -> str:
+    """
+    The words of a websearch_to_tsquery query that matching documents
+    contain: without -exclusions and OR operators (quotes are stripped as
+    punctuation by `analyze_query`).
+    """
+    return " ".join(word for word in query.split() if not word.startswith("-") and word.lower() != "or")
+
+
+def substring_filter(term: str, columns=SUBSTRING_COLUMNS):
+    """
+    Case-insensitive substring match of `term` on every column of `columns`.
+    Each branch of the OR is answered by its own trigram index (BitmapOr).
+    """
+    pattern = f"%{escape_like(term)}%"
+    return or_(*(column.ilike(pattern, escape="\\") for column in columns))
+
+
+def any_term_filter(terms: list[str], columns=SUBSTRING_COLUMNS):
+    """
+    Match documents containing any of `terms`.
+    Terms too short to produce a trigram are dropped when longer ones exist,
+    otherwise they would force a scan of the whole index.
+    """
+    indexable = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM_LENGTH] or terms
+    return or_(*(substring_filter(term, columns) for term in indexable))
+
+
+def substring_rank(query: str, terms: list[str], exact_match: bool, columns=SUBSTRING_COLUMNS):
+    """
+    Filter and tier rank for the ILIKE engine, evaluated in a single query.
+    Tiers: whole query (3) > first term (2) > any other term (1).
+    :param columns: Columns searched; STEMMED_COLUMNS with analysed terms,
+        RAW_COLUMNS with the words as typed.
+    :return: (filter, rank) SQL expressions.
+    """
+    if exact_match:
+        exact_filter = or_(*(column == query for column in columns))
+    else:
+        exact_filter = substring_filter(query, columns)
+
+    tiers = [(exact_filter, 3)]
+    # For a single term without exact_match the first-term tier is the same pattern
+    if exact_match or len(terms) > 1:
+        tiers.append((substring_filter(terms[0], columns), 2))
+    if len(terms) > 1:
+        tiers.append((any_term_filter(terms[1:], columns), 1))
+
+    search_filter = or_(*(condition for condition, _ in tiers))
+    rank = case(*tiers, else_=0)
+    return search_filter, rank
+
+
+def encode_cursor(rank, document_date, pdf_id: int) -> str:
+    """
+    Opaque keyset cursor for the last row of a page: (rank, document_date, id).
+    """
+    payload = [rank, document_date.isoformat() if document_date else None, pdf_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Inverse of encode_cursor.
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, document_date, pdf_id = json.loads(base64.urlsafe_b64decode(padded))
+        if document_date is not None:
+            document_date = datetime.date.fromisoformat(document_date)
+        return rank, document_date, int(pdf_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_filter(rank, cursor: str):
+    """
+    Rows strictly after the cursor for the ordering
+    rank DESC, document_date DESC NULLS LAST, id ASC.
+    `rank` is None for listings that are not ranked.
+    """
+    last_rank, last_date, last_id = decode_cursor(cursor)
+
+    if last_date is None:
+        # NULL dates sort last, so only later ids with NULL dates remain
+        after = and_(PDFFile.document_date.is_(None), PDFFile.id > last_id)
+    else:
+        after = or_(
+            PDFFile.document_date < last_date,
+            PDFFile.document_date.is_(None),
+            and_(PDFFile.document_date == last_date, PDFFile.id > last_id),
+        )
+
+    if rank is None or last_rank is None:
+        return after
+    # Cast back to the rank type so float4 ranks compare exactly
+    last_rank = cast(last_rank, rank.type)
+    return or_(rank < last_rank, and_(rank == last_rank, after))
@@ -0,0 +1,136 @@
+import re
+from functools import lru_cache
+from itertools import islice
+
+# Width of the snippet window, in characters (50 on each side of a lone match)
+SNIPPET_WIDTH = 100
+
+# Stop scanning a document after this many matches; the densest window is
+# almost always found long before and huge documents stay cheap
+MAX_MATCHES = 500
+
+# Plain letters and the accented forms they match
+ACCENT_CLASSES = {"a": "áàä", "e": "éèë", "i": "íìï", "o": "óòö", "u": "úùü", "n": "ñ"}
+ACCENT_FOLDS = str.maketrans({
+    accented: plain for plain, chars in ACCENT_CLASSES.items() for accented in chars
+})
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase and strip Spanish accents of a short string (query terms,
+    vocabulary keys); documents are never folded, see `find_matches`.
+    """
+    return text.lower().translate(ACCENT_FOLDS)
+
+
+def term_pattern(term: str) -> str:
+    """
+    Regex for a lowercase term that matches any accented spelling of it.
+    """
+    return "".join(
+        f"[{char}{ACCENT_CLASSES[char]}]" if char in ACCENT_CLASSES else re.escape(char)
+        for char in fold(term)
+    )
+
+
+@lru_cache(maxsize=256)
+def compile_terms(terms: tuple, flags: int = 0) -> list:
+    """
+    One accent insensitive pattern per distinct term. Separate patterns keep
+    the literal prefix of each term, which the C regex engine searches for
+    much faster than it can try an alternation at every position.
+    """
+    return [re.compile(term_pattern(term), flags) for term in dict.fromkeys(fold(term) for term in terms if term)]
+
+
+def merge_matches(matches: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Sort the matches of several terms, dropping overlaps so longer terms win
+    over their own prefixes, and keep at most MAX_MATCHES.
+    """
+    result = []
+    for start, end in sorted(matches, key=lambda span: (span[0], -span[1])):
+        if not result or start >= result[-1][1]:
+            result.append((start, end))
+            if len(result) >= MAX_MATCHES:
+                break
+    return result
+
+
+def find_matches(source: str, terms: list[str]) -> list[tuple[int, int]]:
+    """
+    Offsets of every term occurrence in `source`, case and accent insensitive.
+    The text is lowercased once (as a plain substring search would); if that
+    changes its length (e.g. "İ") offsets would shift, so the patterns run
+    case-insensitively on the text itself instead.
+    """
+    lowered = source.lower()
+    if len(lowered) == len(source):
+        patterns = compile_terms(tuple(terms))
+    else:
+        lowered, patterns = source, compile_terms(tuple(terms), re.IGNORECASE)
+
+    matches = []
+    for pattern in patterns:
+        matches.extend(match.span() for match in islice(pattern.finditer(lowered), MAX_MATCHES))
+    return merge_matches(matches)
+
+
+def find_analyzed_matches(source: str, terms: list[str]) -> list[tuple[int, int]]:
+    """
+    Offsets of every term occurrence in analysed text (the `content` column),
+    which is already lowercase and holds the same stems as the query, so a
+    plain str.find per term is enough: no regex, no copy of the document.
+    """
+    matches = []
+    for term in {term.lower() for term in terms if term}:
+        index = source.find(term)
+        found = 0
+        while index != -1 and found < MAX_MATCHES:
+            matches.append((index, index + len(term)))
+            found += 1
+            index = source.find(term, index + len(term))
+    return merge_matches(matches)
+
+
+def densest_window(matches: list[tuple[int, int]], source: str, width: int = SNIPPET_WIDTH) -> tuple[int, int]:
+    """
+    Window of `width` characters holding the most matches (two pointers).
+    """
+    best_start, best_count = 0, 0
+    left = 0
+    for right, (_, end) in enumerate(matches):
+        while left < right and end - matches[left][0] > width:
+            left += 1
+        if right - left + 1 > best_count:
+            best_start, best_count = left, right - left + 1
+
+    first = matches[best_start][0]
+    last = matches[best_start + best_count - 1][1]
+    # Centre the covered span in the window
+    start = max(first - (width - (last - first)) // 2, 0)
+    end = min(start + width, len(source))
+    return max(end - width, 0), end
+
+
+def highlight(source: str, terms: list[str], width: int = SNIPPET_WIDTH, analyzed: bool = False):
+    """
+    Build a snippet around the densest cluster of term matches.
+    :param analyzed: `source` is analysed text (lowercase stems), see `find_analyzed_matches`.
+    :return: (snippet, highlights) where highlights are [start, end] offsets
+        inside the snippet, for client-side <mark> rendering; None if no match.
+    """
+    if not source:
+        return None
+    matches = (find_analyzed_matches if analyzed else find_matches)(source, terms)
+    if not matches:
+        return None
+
+    start, end = densest_window(matches, source, width)
+    highlights = [
+        [max(m_start, start) - start, min(m_end, end) - start]
+        for m_start, m_end in matches
+        if m_start < end and m_end > start
+    ]
+    return source[start:end], highlights
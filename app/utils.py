@@ -1,202 +1,596 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import datetime
+import hashlib
 import locale
 import os
 from pathlib import Path
 import re
-from pdfminer.high_level import extract_text
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import SnowballStemmer
-from app.config import SessionLocal
-from app.models import PDFFile
-
-import fitz  # PyMuPDF
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
-
-# Ensure NLTK resources are downloaded
-import nltk
-
-nltk.download('punkt')
-nltk.download('stopwords')
-
-# Set NLTK stopwords for Spanish
-STOPWORDS = set(stopwords.words('spanish'))
-
-# Initialize the Spanish stemmer
-SPANISH_STEMMER = SnowballStemmer("spanish")
-def extract_text_from_image(pdf_path):
-    text = ""
-    doc = fitz.open(pdf_path)
-
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text += page.get_text("text")  # Extrae texto normal
-        if not text.strip():  # Si la página no tiene texto, intentar OCR
-            images = convert_from_path(pdf_path, first_page=page_num+1, last_page=page_num+1)
-            for img in images:
-                text += pytesseract.image_to_string(img, lang="spa")  # Extraer texto con OCR
-        
-    return text.strip()
-
-def extract_date_from_text(text: str) -> datetime.date:
-    
-   # Expresiones regulares
-    patrones = [
-        r"(?:EL DIA \w+\s+)?(\d{1,2}|\w+)\s+DE\s+([A-ZÁÉÍÓÚ]+)\s+DEL\s+DOS\s+MIL(?:\s+(\w+))?",  # Formato largo con "DEL DOS MIL"
-        r"(\d{1,2})\s+DE\s+([A-ZÁÉÍÓÚ]+)\s+DE\s+(\d{4})",  # Formato corto con año en 4 dígitos
-        r"(?:EL DIA \w+\s+)?(\d{1,2}|\w+)\s+DE\s+([A-ZÁÉÍÓÚ]+)\s+DE\s+DOS\s+MIL(?:\s+(\w+))?"  # Formato largo con "DE DOS MIL"
-    ]
+from app.analyzer import get_analyzer
+from app.config import SessionLocal, INGEST_WORKERS, INGEST_BATCH_SIZE, DATE_LEADING_CHARS, DATE_TRAILING_CHARS
+from app.dates import extract_date_from_text, find_date_in_windows
+from app.extractors import iter_pages, ordered_results
+from app.generation import bump_generation
+from sqlalchemy import BigInteger, Date, Float, String, Text, case, cast, column, func, null, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from app.models import IngestionRun, IngestionRunFile, PDFFile, Vocabulary, build_search_vector
 
-    # Buscar la primera coincidencia válida
-    match = next((re.search(pat, text, re.IGNORECASE) for pat in patrones if re.search(pat, text, re.IGNORECASE)), None)
 
-    # Si se encontró una coincidencia, imprimir los grupos
-    if match:
-        print("Fecha Exitosa")
-    else:
-        print(f"No se encontró una fecha válida en{text}")
-        
-    if match:
-        day_text, month_text, year_text = match.groups()
-    
-        # Diccionario de conversión de nombres de meses a números
-        meses = {
-            "ENERO": 1, "FEBRERO": 2, "MARZO": 3, "ABRIL": 4, "MAYO": 5, "JUNIO": 6,
-            "JULIO": 7, "AGOSTO": 8, "SEPTIEMBRE": 9, "OCTUBRE": 10, "NOVIEMBRE": 11, "DICIEMBRE": 12
-        }
-        
-        # Diccionario de conversión de números escritos a enteros
-        numeros_texto = { 
-            "PRIMERO":1,"UNO": 1, "DOS": 2, "TRES": 3, "CUATRO": 4, "CINCO": 5, "SEIS": 6, "SIETE": 7,
-            "OCHO": 8, "NUEVE": 9, "DIEZ": 10, "ONCE": 11, "DOCE": 12, "TRECE": 13,
-            "CATORCE": 14, "QUINCE": 15, "DIECISÉIS": 16, "DIECISIETE": 17, "DIECIOCHO": 18,
-            "DIECINUEVE": 19, "VEINTE": 20, "VEINTIUNO": 21, "VEINTIDÓS": 22, "VEINTITRÉS": 23,
-            "VEINTICUATRO": 24, "VEINTICINCO": 25, "VEINTISÉIS": 26, "VEINTISIETE": 27,
-            "VEINTIOCHO": 28, "VEINTINUEVE": 29, "TREINTA": 30, "TREINTA Y UNO": 31
-        }
-
-        # Convertir el mes a número
-        month = meses.get(month_text.upper())
-        
-        # Determinar el día (puede ser número o texto)
-        day = numeros_texto.get(day_text.upper(), None) if not day_text.isdigit() else int(day_text)
-
-        # Determinar el año (puede ser vacío o en texto)
-        if year_text.isdigit():
-            year = int(year_text)
-        else:
-            year = 2000 + numeros_texto.get(year_text.upper(), 0) if year_text else 2000  # Si no hay año, asumir 2000
+def preprocess_text(text: str) -> str:
+    """
+    Preprocess the text by removing Spanish stopwords, stemming, and unnecessary characters.
+    Shared with query analysis through `app.analyzer`, so both produce the same terms.
+    :param text: The raw text to preprocess.
+    :return: Preprocessed text.
+    """
+    try:
+        return get_analyzer().analyze(text)
+    except Exception as e:
+        print(f"Error during text preprocessing: {e}")
+        return ""
+
 
-        if day and month and year:
-            # Convertir a tipo datetime.date
-            date_obj = datetime.date(year=year, month=month, day=day)
-            print(f"Fecha extraída: {date_obj}")
-            return date_obj
-    
-    return None
+VOCABULARY_WORD = re.compile(r"[^\W\d_]{3,}")
+VOCABULARY_BATCH_SIZE = 1000
 
 
+def extract_vocabulary(text: str) -> Counter:
+    """
+    Count the autocomplete terms of a document: lowercased words of at least
+    three letters that are not stopwords.
+    :param text: The raw text of the document.
+    :return: Counter of term -> occurrences.
+    """
+    stopwords = get_analyzer().stopwords
+    return Counter(
+        word for word in VOCABULARY_WORD.findall(text.lower()) if word not in stopwords
+    )
 
 
+def update_vocabulary(db, doc_freq: Counter, total_freq: Counter):
+    """
+    Add document and occurrence counts to the vocabulary table (upsert).
+    Runs in the caller's transaction.
+    Negative counts remove documents; terms left without documents are deleted.
+    """
+    rows = [
+        {"term": term, "doc_freq": doc_freq[term], "total_freq": total_freq[term]}
+        for term in sorted(set(doc_freq) | set(total_freq))
+        if doc_freq[term] or total_freq[term]
+    ]
+    for start in range(0, len(rows), VOCABULARY_BATCH_SIZE):
+        statement = insert(Vocabulary).values(rows[start:start + VOCABULARY_BATCH_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=[Vocabulary.term],
+            set_={
+                "doc_freq": Vocabulary.doc_freq + statement.excluded.doc_freq,
+                "total_freq": Vocabulary.total_freq + statement.excluded.total_freq,
+            },
+        )
+        db.execute(statement)
+    if any(count < 0 for count in doc_freq.values()):
+        db.query(Vocabulary).filter(Vocabulary.doc_freq <= 0).delete(synchronize_session=False)
 
 
-def preprocess_text(text: str) -> str:
+def rebuild_vocabulary():
     """
-    Preprocess the text by removing Spanish stopwords, stemming, and unnecessary characters.
-    :param text: The raw text to preprocess.
-    :return: Preprocessed text.
+    Recompute the vocabulary table from every document in the database.
+    Only needed once for documents ingested before the table existed.
     """
+    db = SessionLocal()
     try:
-        # Tokenize the text into words
-        tokens = word_tokenize(text)
+        doc_freq, total_freq = Counter(), Counter()
+        for (original_content,) in db.query(PDFFile.original_content).yield_per(100):
+            counts = extract_vocabulary(original_content)
+            doc_freq.update(counts.keys())
+            total_freq.update(counts)
+        db.query(Vocabulary).delete()
+        update_vocabulary(db, doc_freq, total_freq)
+        bump_generation(db)
+        db.commit()
+        print(f"Vocabulary rebuilt with {len(total_freq)} terms.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding vocabulary: {e}")
+    finally:
+        db.close()
 
-        # Remove stopwords and non-alphanumeric tokens
-        filtered_tokens = [word for word in tokens if word.lower() not in STOPWORDS and word.isalnum()]
 
-        # Apply stemming using the Spanish stemmer
-        stemmed_tokens = [SPANISH_STEMMER.stem(word) for word in filtered_tokens]
+def file_hash(file_path: str) -> str:
+    """
+    SHA-256 of the file contents, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def process_pdf(file_path: str) -> dict:
+    """
+    CPU-bound part of ingestion for one file: extract, preprocess, find the
+    date and count the vocabulary. Runs in a worker process in parallel mode.
+    Pages are preprocessed as they are extracted, so only the final column
+    values are held for the whole document, never its full token lists.
+    :param file_path: Path to the PDF file.
+    :return: Column values and vocabulary counts, or None if no text was found.
+    """
+    raw_pages, content_pages, vocabulary = [], [], Counter()
+    for page_text in iter_pages(file_path):
+        raw_pages.append(page_text)
+        if page_text.strip():
+            content_pages.append(preprocess_text(page_text))
+            vocabulary.update(extract_vocabulary(page_text))
+    raw_text = "\n".join(raw_pages).strip()
+    del raw_pages
+
+    # Si no hay texto, omitir el archivo
+    if not raw_text:
+        print(f"No text extracted from {file_path}")
+        return None
+
+    stat = os.stat(file_path)
+    return {
+        "content": " ".join(page for page in content_pages if page),
+        "original_content": raw_text,
+        "document_date": extract_date_from_text(raw_text),
+        "vocabulary": vocabulary,
+        "file_size": stat.st_size,
+        "file_mtime": stat.st_mtime,
+        "content_hash": file_hash(file_path),
+    }
 
-        # Join the tokens back into a string
-        return " ".join(stemmed_tokens)
+
+def _process_pdf_safely(file_path: str):
+    """
+    Wrapper for the process pool: failures are returned, not raised, so one
+    bad file does not stop the run.
+    :return: (result, error message)
+    """
+    try:
+        return process_pdf(file_path), None
     except Exception as e:
-        print(f"Error during text preprocessing: {e}")
-        return ""
+        return None, f"{type(e).__name__}: {e}"
+
 
+# Columns written by ingestion, in INSERT order (search_vector is derived)
+INSERT_COLUMNS = {
+    "file_name": String, "file_path": String, "content": Text, "original_content": Text,
+    "document_date": Date, "file_size": BigInteger, "file_mtime": Float, "content_hash": String,
+}
 
-def extract_text_from_pdf(file_path: str) -> str:
+
+def insert_pdf_rows(db, rows: list[dict]):
     """
-    Extract raw text from a PDF file.
-    :param file_path: Path to the PDF file.
-    :return: Raw text.
+    Insert many documents with a single INSERT ... SELECT FROM (VALUES ...),
+    computing search_vector in the database. Each text is sent only once and
+    no ORM objects are kept in the session.
+    """
+    if not rows:
+        return
+    data = values(*(column(name, type_) for name, type_ in INSERT_COLUMNS.items()), name="new_rows").data(
+        [tuple(row[name] for name in INSERT_COLUMNS) for row in rows]
+    )
+    source = select(
+        *(cast(data.c[name], type_) for name, type_ in INSERT_COLUMNS.items()),
+        build_search_vector(data.c.file_name, data.c.original_content),
+    )
+    db.execute(insert(PDFFile).from_select([*INSERT_COLUMNS, "search_vector"], source))
+
+
+def _error_message(error: Exception) -> str:
+    # The driver's message, without the statement and its multi-MB parameters
+    return str(getattr(error, "orig", None) or error)
+
+
+def insert_pdf_rows_isolated(db, rows: list[dict]) -> dict:
     """
+    Insert `rows` with one statement; if that fails, insert each row in its
+    own savepoint, so one bad document (a NUL byte in its text, an
+    oversized tsvector...) fails alone instead of the whole batch.
+    :return: {file path: error} of the rows that could not be inserted.
+    """
+    if not rows:
+        return {}
     try:
-        # Extract raw text
-        raw_text = extract_text(file_path)
-        print(f"Raw text from {file_path}:\n{raw_text[:500]}")  # Log the first 500 characters of the raw text
-        if not raw_text.strip():
-            print(f"No text extracted from {file_path}")
-            
-            return ""
-        return raw_text
+        with db.begin_nested():
+            insert_pdf_rows(db, rows)
+        return {}
     except Exception as e:
-        print(f"Error extracting text from {file_path}: {e}")
-        return ""
+        if len(rows) == 1:
+            return {rows[0]["file_path"]: _error_message(e)}
+        print(f"Batch insert failed ({_error_message(e)}); inserting {len(rows)} documents one by one.")
+
+    errors = {}
+    for row in rows:
+        try:
+            with db.begin_nested():
+                insert_pdf_rows(db, [row])
+        except Exception as e:
+            errors[row["file_path"]] = _error_message(e)
+    return errors
+
+
+def classify_files(db, pdf_directory: str):
+    """
+    Compare the PDFs on disk with the manifest stored in the database, using
+    one query for the whole directory.
+    Files whose size and mtime match are unchanged without being read; the
+    others are hashed, so a touched but identical file is not re-extracted.
+    Rows ingested before the manifest existed are adopted as unchanged.
+    :return: (new paths, {modified path: row id}, unchanged count,
+        {deleted path: row id})
+    """
+    directory = str(Path(pdf_directory))
+    manifest = {
+        row.file_path: row
+        for row in db.query(
+            PDFFile.id, PDFFile.file_path, PDFFile.file_size, PDFFile.file_mtime, PDFFile.content_hash
+        )
+        if os.path.dirname(row.file_path) == directory
+    }
 
+    new_files, modified_files, unchanged = [], {}, 0
+    for pdf_file in sorted(Path(pdf_directory).glob("*.pdf")):
+        path = str(pdf_file)
+        row = manifest.pop(path, None)
+        if row is None:
+            new_files.append(path)
+            continue
 
-def populate_database_from_pdfs(pdf_directory: str):
+        stat = pdf_file.stat()
+        if row.file_size == stat.st_size and row.file_mtime == stat.st_mtime:
+            unchanged += 1
+            continue
+
+        content_hash = file_hash(path)
+        if row.content_hash is None or row.content_hash == content_hash:
+            # Same bytes (or first run with a manifest): only refresh the stat
+            db.query(PDFFile).filter(PDFFile.id == row.id).update({
+                "file_size": stat.st_size, "file_mtime": stat.st_mtime, "content_hash": content_hash,
+            })
+            unchanged += 1
+        else:
+            modified_files[path] = row.id
+
+    deleted_files = {path: row.id for path, row in manifest.items()}
+    return new_files, modified_files, unchanged, deleted_files
+
+
+def _forget_vocabulary(db, pdf_id: int, doc_freq: Counter, total_freq: Counter):
+    """
+    Subtract the vocabulary of a stored document before it is replaced or deleted.
+    """
+    original_content = db.query(PDFFile.original_content).filter(PDFFile.id == pdf_id).scalar()
+    counts = extract_vocabulary(original_content or "")
+    doc_freq.subtract(counts.keys())
+    total_freq.subtract(counts)
+
+
+def _plan_run(db, pdf_directory: str, run_id: int, retry_failed: bool, allow_empty: bool, summary: dict):
+    """
+    Decide which files a run processes.
+    A new run classifies the directory, removes deleted documents and
+    records every new or modified file as pending. A resumed run takes the
+    files still pending in that run (and the failed ones with `retry_failed`).
+    :return: (run, sorted paths, {modified path: row id})
+    :raises ValueError: If the directory is missing, or has no PDFs while
+        documents are indexed from it and `allow_empty` is not set (an
+        unmounted volume must not wipe the index).
+    """
+    if run_id is None:
+        if not Path(pdf_directory).is_dir():
+            raise ValueError(f"{pdf_directory} is not a directory")
+
+        run = IngestionRun(directory=pdf_directory, status="running")
+        db.add(run)
+        db.flush()
+
+        new_files, modified_files, summary["unchanged"], deleted_files = classify_files(db, pdf_directory)
+        if deleted_files and not (new_files or modified_files or summary["unchanged"]) and not allow_empty:
+            raise ValueError(
+                f"No PDFs found in {pdf_directory}, but {len(deleted_files)} documents are indexed from it; "
+                f"use allow_empty to remove them"
+            )
+        doc_freq, total_freq = Counter(), Counter()
+        for path, pdf_id in deleted_files.items():
+            print(f"Removing {os.path.basename(path)}: no longer on disk.")
+            _forget_vocabulary(db, pdf_id, doc_freq, total_freq)
+            db.query(PDFFile).filter(PDFFile.id == pdf_id).delete(synchronize_session=False)
+            summary["deleted"] += 1
+        update_vocabulary(db, doc_freq, total_freq)
+        if deleted_files:
+            bump_generation(db)
+
+        paths = sorted(new_files + list(modified_files))
+        db.add_all(IngestionRunFile(run_id=run.id, file_path=path, status="pending") for path in paths)
+        db.commit()
+        return run, paths, modified_files
+
+    run = db.get(IngestionRun, run_id)
+    if run is None:
+        raise ValueError(f"Ingestion run {run_id} does not exist")
+    statuses = ["pending", "failed"] if retry_failed else ["pending"]
+    paths = sorted(
+        path for (path,) in db.query(IngestionRunFile.file_path)
+        .filter(IngestionRunFile.run_id == run.id, IngestionRunFile.status.in_(statuses))
+    )
+    existing = dict(
+        db.query(PDFFile.file_path, PDFFile.id).filter(PDFFile.file_path.in_(paths))
+    ) if paths else {}
+    run.status, run.finished_at = "running", None
+    db.commit()
+    print(f"Resuming ingestion run {run.id}: {len(paths)} files left.")
+    return run, paths, existing
+
+
+def populate_database_from_pdfs(pdf_directory: str, workers: int = INGEST_WORKERS, batch_size: int = INGEST_BATCH_SIZE,
+                                run_id: int = None, retry_failed: bool = False, allow_empty: bool = False):
+    """
+    Incrementally index `pdf_directory`: new files are added, modified files
+    re-extracted, deleted files removed and unchanged files left alone.
+    Every call is recorded as an ingestion run with a status per file, and
+    work is committed every `batch_size` files, so a crash loses at most one
+    batch. Passing the `run_id` of an interrupted run resumes it, skipping
+    the files already done; `retry_failed` also reprocesses its failed files.
+    A missing directory fails the run, and so does one without PDFs while
+    documents are indexed from it, unless `allow_empty` is set.
+    With `workers` > 1 extraction runs in a process pool while this process
+    is the single writer; results are written in file-name order, so runs
+    are deterministic regardless of the worker count.
+    :return: Summary with the run id, the count of added, updated,
+        unchanged, deleted and skipped files, the error of every file
+        that failed and, if the run itself failed, its error.
+    """
+    summary = {
+        "run_id": run_id, "added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0, "failed": {},
+        "error": None,
+    }
     db = SessionLocal()
+    run = None
     try:
-        pdf_files = Path(pdf_directory).glob("*.pdf")
-        for pdf_file in pdf_files:
-            existing_file = db.query(PDFFile).filter(PDFFile.file_path == str(pdf_file)).first()
-            if existing_file:
-                print(f"Skipping {pdf_file.name}: already in the database.")
-                continue
-
-            raw_text = extract_text_from_pdf(str(pdf_file))
-            if not raw_text:
-                raw_text = extract_text_from_image(str(pdf_file))
-        
-            
-            # Si sigue sin texto, omitir el archivo
-            if not raw_text.strip():
-                print(f"No se pudo extraer texto de {pdf_file.name}. Saltando...")
-                continue
-
-            preprocessed_text = preprocess_text(raw_text)
-            document_date = extract_date_from_text(raw_text)
-
-            pdf_record = PDFFile(
-                file_name=pdf_file.name,
-                file_path=str(pdf_file),
-                content=preprocessed_text,
-                original_content=raw_text,
-                document_date=document_date
-            )
-            db.add(pdf_record)
+        run, paths, modified_files = _plan_run(db, pdf_directory, run_id, retry_failed, allow_empty, summary)
+        summary["run_id"] = run.id
+
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = ordered_results(executor, _process_pdf_safely, paths, workers * 2)
+        else:
+            executor = None
+            results = map(_process_pdf_safely, paths)
+
+        doc_freq, total_freq = Counter(), Counter()
+        pending = {"rows": [], "vocabularies": [], "changes": 0, "statuses": []}
+
+        def fail(status: dict, error: str):
+            """
+            Record a file as failed in the run, so `retry_failed` can target it.
+            """
+            print(f"Error processing {os.path.basename(status['file_path'])}: {error}")
+            summary["failed"][status["file_path"]] = error
+            status.update(status="failed", error=error)
+
+        def commit_batch():
+            """
+            Write the pending new rows with one INSERT, apply the vocabulary
+            counts, record the file statuses and commit, so memory and
+            transaction size stay bounded and the run can resume from here.
+            A row the database rejects only marks its own file as failed.
+            """
+            errors = insert_pdf_rows_isolated(db, pending["rows"])
+            for row, vocabulary in zip(pending["rows"], pending["vocabularies"]):
+                if row["file_path"] not in errors:
+                    doc_freq.update(vocabulary.keys())
+                    total_freq.update(vocabulary)
+            for status in pending["statuses"]:
+                if status["file_path"] in errors:
+                    fail(status, errors[status["file_path"]])
+            added = len(pending["rows"]) - len(errors)
+
+            update_vocabulary(db, doc_freq, total_freq)
+            if added or pending["changes"]:
+                bump_generation(db)
+            if pending["statuses"]:
+                db.execute(update(IngestionRunFile), pending["statuses"])
+            db.commit()
+            # Only count what is committed, so a crashed run reports real progress
+            summary["added"] += added
+            summary["updated"] += pending["changes"]
+            pending["rows"], pending["vocabularies"], pending["changes"], pending["statuses"] = [], [], 0, []
+            doc_freq.clear()
+            total_freq.clear()
+
+        try:
+            for path, (result, error) in zip(paths, results):
+                file_name = os.path.basename(path)
+                status = {"run_id": run.id, "file_path": path, "status": "done", "error": None}
+                pending["statuses"].append(status)
+                if error:
+                    fail(status, error)
+                    continue
+                if result is None:
+                    print(f"No se pudo extraer texto de {file_name}. Saltando...")
+                    summary["skipped"] += 1
+                    status.update(status="failed", error="No text could be extracted")
+                    continue
+
+                values = dict(
+                    file_name=file_name,
+                    file_path=path,
+                    content=result["content"],
+                    original_content=result["original_content"],
+                    document_date=result["document_date"],
+                    file_size=result["file_size"],
+                    file_mtime=result["file_mtime"],
+                    content_hash=result["content_hash"],
+                )
+                if path in modified_files:
+                    print(f"Re-indexing {file_name}: file changed.")
+                    pdf_id = modified_files[path]
+                    forgotten_docs, forgotten_total = Counter(), Counter()
+                    _forget_vocabulary(db, pdf_id, forgotten_docs, forgotten_total)
+                    values["search_vector"] = build_search_vector(file_name, result["original_content"])
+                    try:
+                        # A savepoint, so a rejected document does not abort the batch
+                        with db.begin_nested():
+                            db.query(PDFFile).filter(PDFFile.id == pdf_id).update(values, synchronize_session=False)
+                    except Exception as e:
+                        fail(status, _error_message(e))
+                        continue
+                    pending["changes"] += 1
+                    doc_freq.update(forgotten_docs)
+                    total_freq.update(forgotten_total)
+                    doc_freq.update(result["vocabulary"].keys())
+                    total_freq.update(result["vocabulary"])
+                else:
+                    # Counted in commit_batch, once the row is inserted
+                    pending["rows"].append(values)
+                    pending["vocabularies"].append(result["vocabulary"])
+
+                if len(pending["statuses"]) >= batch_size:
+                    commit_batch()
+            commit_batch()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        run.status, run.finished_at = "done", datetime.datetime.now()
         db.commit()
-        print(f"Database populated with PDFs from {pdf_directory}.")
+        print(f"Database populated with PDFs from {pdf_directory} (run {run.id}): "
+              f"{summary['added']} added, {summary['updated']} updated, {summary['unchanged']} unchanged, "
+              f"{summary['deleted']} deleted, {summary['skipped']} skipped, {len(summary['failed'])} failed.")
     except Exception as e:
         db.rollback()
         print(f"Error populating database: {e}")
+        summary["error"] = str(e)
+        if run is not None:
+            # Batches committed so far are kept; resume with run_id=run.id
+            db.query(IngestionRun).filter(IngestionRun.id == run.id).update(
+                {"status": "failed", "finished_at": datetime.datetime.now()}
+            )
+            db.commit()
     finally:
         db.close()
+    return summary
 
-def backfill_document_dates():
-    db = SessionLocal()
+def _find_dates(rows: list) -> list:
+    """
+    Dates for a batch of (id, windows) rows; runs in a worker process in parallel mode.
+    :return: [(id, DateMatch or None)]
+    """
+    return [(pdf_id, find_date_in_windows(windows)) for pdf_id, windows in rows]
+
+
+def backfill_document_dates(workers: int = INGEST_WORKERS, batch_size: int = INGEST_BATCH_SIZE):
+    """
+    Extract the date of every document that has none.
+    Only `document_date IS NULL` rows are streamed, and only their leading and
+    trailing date windows leave the database (cut with left()/right() in SQL).
+    Batches are parsed in parallel and written back with one bulk UPDATE and
+    commit each, so an interrupted backfill keeps its progress.
+    """
+    text = PDFFile.original_content
+    length = func.length(text)
+    if DATE_LEADING_CHARS or DATE_TRAILING_CHARS:
+        # Short documents come back whole, long ones as their two windows
+        short = length <= DATE_LEADING_CHARS + DATE_TRAILING_CHARS
+        head = case((short, text), else_=func.left(text, DATE_LEADING_CHARS))
+        tail = case((short, None), else_=func.right(text, DATE_TRAILING_CHARS))
+    else:
+        head, tail = text, null()
+    query = (
+        select(PDFFile.id, length, head, tail)
+        .where(PDFFile.document_date.is_(None))
+        .order_by(PDFFile.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    def batches(result):
+        for partition in result.partitions():
+            yield [
+                (pdf_id, [(0, head_text)] + ([(text_length - len(tail_text), tail_text)] if tail_text else []))
+                for pdf_id, text_length, head_text, tail_text in partition
+            ]
+
+    read_db, db = SessionLocal(), SessionLocal()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    updated = scanned = 0
     try:
-        pdf_files = db.query(PDFFile).all()
-        for pdf in pdf_files:
-            if not pdf.document_date:
-                document_date = extract_date_from_text(pdf.original_content)
-                if document_date:
-                    pdf.document_date = document_date
-        db.commit()
+        rows = batches(read_db.execute(query))
+        results = ordered_results(executor, _find_dates, rows, workers * 2) if executor else map(_find_dates, rows)
+        for batch in results:
+            scanned += len(batch)
+            updates = [{"id": pdf_id, "document_date": match.date} for pdf_id, match in batch if match]
+            if updates:
+                db.execute(update(PDFFile), updates)  # Bulk UPDATE by primary key
+                db.commit()
+                updated += len(updates)
+            print(f"Backfill: {scanned} documents scanned, {updated} dated")
+        if updated:
+            bump_generation(db)
+            db.commit()
         print("Backfill complete!")
     except Exception as e:
         db.rollback()
         print(f"Error during backfill: {e}")
     finally:
+        if executor:
+            executor.shutdown()
+        read_db.close()
+        db.close()
+
+
+def _reanalyze(rows: list) -> list:
+    """
+    Analysed `content` for a batch of (id, content md5, original_content) rows,
+    only for the rows where it changed; runs in a worker process in parallel mode.
+    :return: [{"id": ..., "content": ...}]
+    """
+    updates = []
+    for pdf_id, content_md5, original_content in rows:
+        content = preprocess_text(original_content)
+        if hashlib.md5(content.encode()).hexdigest() != content_md5:
+            updates.append({"id": pdf_id, "content": content})
+    return updates
+
+
+def reanalyze_content(workers: int = INGEST_WORKERS, batch_size: int = INGEST_BATCH_SIZE):
+    """
+    Recompute `content` from `original_content` with the current analyzer,
+    without re-extracting any PDF (unchanged files are never re-extracted by
+    an ingestion run). Only an md5 of the stored content leaves the database
+    besides the original text, and only rows whose content changes are
+    written, one bulk UPDATE and commit per batch, so an interrupted run
+    keeps its progress and can simply be started again.
+    """
+    query = (
+        select(PDFFile.id, func.md5(PDFFile.content), PDFFile.original_content)
+        .order_by(PDFFile.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    read_db, db = SessionLocal(), SessionLocal()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    updated = 0
+    try:
+        rows = ([tuple(row) for row in partition] for partition in read_db.execute(query).partitions())
+        results = ordered_results(executor, _reanalyze, rows, workers * 2) if executor else map(_reanalyze, rows)
+        for updates in results:
+            if updates:
+                db.execute(update(PDFFile), updates)  # Bulk UPDATE by primary key
+                db.commit()
+                updated += len(updates)
+            print(f"Reanalyze: {updated} documents updated")
+        if updated:
+            bump_generation(db)
+            db.commit()
+        print(f"Reanalyze complete: {updated} documents updated.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error during reanalyze: {e}")
+    finally:
+        if executor:
+            executor.shutdown()
+        read_db.close()
         db.close()
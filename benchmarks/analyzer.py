@@ -0,0 +1,99 @@
+# Text analysis throughput, old NLTK pipeline vs app.analyzer:
+#
+#   python benchmarks/analyzer.py ./sample_pdfs
+#   python benchmarks/analyzer.py ./corpus_txt --rounds 5
+#
+# The corpus is every .pdf (text extracted with the default chain) and .txt
+# file in the directory. The old preprocess_text ran NLTK word_tokenize,
+# filtered stopwords and non-alphanumeric tokens, and called the Snowball
+# stemmer once per token. Analyzer.analyze tokenises with one regex and
+# memoises stems per word; each round starts from a fresh Analyzer so the
+# memo is filled inside the measurement. Throughput is in input tokens
+# (regex words) per second; agreement is the share of output terms, counted
+# with repetitions, that both pipelines produce.
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analyzer import TOKEN, Analyzer, get_analyzer
+from app.extractors import extract_text_from_pdf
+
+
+def load_corpus(directory: str) -> list[str]:
+    texts = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() == ".pdf":
+            texts.append(extract_text_from_pdf(str(path)))
+        elif path.suffix.lower() == ".txt":
+            texts.append(path.read_text(encoding="utf-8", errors="replace"))
+    return texts
+
+
+def old_preprocess(text: str, stopwords: set, stemmer, preserve_line: bool = False) -> str:
+    """
+    preprocess_text as it was in app/utils.py before app.analyzer.
+    :param preserve_line: Skip punkt sentence splitting (when punkt_tab is
+        not installed); only makes the old pipeline faster.
+    """
+    from nltk.tokenize import word_tokenize
+
+    tokens = word_tokenize(text, preserve_line=preserve_line)
+    filtered_tokens = [word for word in tokens if word.lower() not in stopwords and word.isalnum()]
+    return " ".join(stemmer.stem(word) for word in filtered_tokens)
+
+
+def best_of(rounds: int, function) -> tuple[float, list[str]]:
+    """
+    :return: (fastest seconds, output of the last round)
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        output = function()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare NLTK word_tokenize + stem with Analyzer.analyze")
+    parser.add_argument("corpus_directory", help="Directory of .pdf and/or .txt files")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus_directory)
+    if not texts:
+        raise SystemExit(f"No .pdf or .txt files in {args.corpus_directory}")
+    tokens = sum(len(TOKEN.findall(text)) for text in texts)
+    print(f"{len(texts)} texts, {tokens} tokens; best of {args.rounds} rounds")
+
+    shared = get_analyzer()
+    try:
+        old_preprocess("Prueba.", shared.stopwords, shared.stemmer)
+        preserve_line = False
+    except LookupError:
+        print("NLTK punkt_tab is not installed: word_tokenize runs without sentence splitting")
+        preserve_line = True
+    old_seconds, old_output = best_of(
+        args.rounds, lambda: [old_preprocess(text, shared.stopwords, shared.stemmer, preserve_line) for text in texts]
+    )
+    new_seconds, new_output = best_of(
+        args.rounds, lambda: Analyzer(shared.stopwords, shared.stemmer).analyze_many(texts)
+    )
+
+    old_terms, new_terms = Counter(" ".join(old_output).split()), Counter(" ".join(new_output).split())
+    agreement = sum((old_terms & new_terms).values()) / max(sum(old_terms.values()), sum(new_terms.values()), 1)
+    print(f"{'pipeline':>22}  {'seconds':>8}  {'tokens/s':>10}  {'terms':>9}")
+    for label, seconds, terms in (
+        ("word_tokenize + stem", old_seconds, old_terms), ("Analyzer.analyze", new_seconds, new_terms),
+    ):
+        print(f"{label:>22}  {seconds:>8.2f}  {tokens / seconds:>10.0f}  {sum(terms.values()):>9}")
+    print(f"Speedup {old_seconds / new_seconds:.1f}x, output agreement {agreement:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# DB_MODE=sync vs DB_MODE=async under a mix of slow and fast queries:
+#
+#   python benchmarks/db_modes.py --concurrency 32 --requests 400 \
+#       --slow "/search?query=de la&mode=ilike&raw_fallback=true" \
+#       --fast "/search?query=convocatoria&mode=fts&page_size=5"
+#
+# Starts one uvicorn worker per mode against DATABASE_URL, with the /search
+# cache disabled so every request reaches the database, and fires the requests
+# concurrently with httpx. With few threadpool slots, slow sync queries hold
+# them and fast queries queue behind; the fast-query latency shows whether the
+# async path keeps them moving.
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)] if values else float("nan")
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DB_MODE=mode, SEARCH_CACHE_BACKEND="none")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"uvicorn did not start in {mode} mode")
+
+
+async def run_load(base_url: str, paths: list[tuple[str, str]], concurrency: int):
+    """
+    :return: ({kind: [latency in seconds]}, {status code: count}, elapsed seconds)
+    """
+    latencies, statuses = {"slow": [], "fast": []}, {}
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def fetch(kind: str, path: str):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    status = (await client.get(path)).status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies[kind].append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(kind, path) for kind, path in paths))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare DB_MODE=sync and DB_MODE=async under concurrent load")
+    parser.add_argument("--slow", default="/search?query=de la&mode=ilike&raw_fallback=true")
+    parser.add_argument("--fast", default="/search?query=convocatoria&mode=fts&page_size=5")
+    parser.add_argument("--slow-ratio", type=float, default=0.2, help="Share of slow requests")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # Same interleaving for every mode
+    random.seed(0)
+    paths = [
+        ("slow", args.slow) if random.random() < args.slow_ratio else ("fast", args.fast)
+        for _ in range(args.requests)
+    ]
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.slow_ratio:.0%} slow")
+    print(f"{'mode':>6}  {'req/s':>7}  {'fast p50':>9}  {'fast p95':>9}  {'fast p99':>9}  {'slow p50':>9}  {'slow p95':>9}  statuses")
+    for mode in args.modes.split(","):
+        server = start_server(mode, args.port)
+        try:
+            # Warm the connection pool and the planner before measuring
+            asyncio.run(run_load(f"http://127.0.0.1:{args.port}", paths[:args.concurrency], args.concurrency))
+            latencies, statuses, elapsed = asyncio.run(
+                run_load(f"http://127.0.0.1:{args.port}", paths, args.concurrency)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        fast, slow = latencies["fast"], latencies["slow"]
+        print(
+            f"{mode:>6}  {len(paths) / elapsed:>7.1f}"
+            f"  {statistics.median(fast) * 1000 if fast else float('nan'):>7.0f}ms"
+            f"  {percentile(fast, 0.95) * 1000:>7.0f}ms  {percentile(fast, 0.99) * 1000:>7.0f}ms"
+            f"  {statistics.median(slow) * 1000 if slow else float('nan'):>7.0f}ms"
+            f"  {percentile(slow, 0.95) * 1000:>7.0f}ms  {dict(sorted(statuses.items(), key=str))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
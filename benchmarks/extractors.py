@@ -0,0 +1,67 @@
+# Text extractor throughput and output quality:
+#
+#   python benchmarks/extractors.py ./sample_pdfs --extractors pymupdf,pdfminer
+#
+# Every extractor runs alone (no fallback) over the same PDFs. Output is
+# compared with the first extractor given, which is the reference (pdfminer
+# was the default before PyMuPDF): similarity is the share of words, counted
+# with repetitions, that both outputs have in common.
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.analyzer import TOKEN
+from app.extractors import extract_text_from_pdf
+
+
+def words(text: str) -> Counter:
+    return Counter(TOKEN.findall(text.lower()))
+
+
+def similarity(reference: Counter, other: Counter) -> float:
+    total = max(sum(reference.values()), sum(other.values()))
+    return sum((reference & other).values()) / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare text extractors on a directory of PDFs")
+    parser.add_argument("pdf_directory")
+    parser.add_argument("--extractors", default="pdfminer,pymupdf", help="Comma-separated; the first is the reference")
+    args = parser.parse_args()
+
+    import fitz
+
+    pdfs = sorted(Path(args.pdf_directory).glob("*.pdf"))
+    if not pdfs:
+        raise SystemExit(f"No PDFs in {args.pdf_directory}")
+    pages = sum(fitz.open(pdf).page_count for pdf in pdfs)
+    names = [name.strip() for name in args.extractors.split(",")]
+    print(f"{len(pdfs)} PDFs, {pages} pages; reference: {names[0]}")
+
+    reference = {}
+    print(f"{'extractor':>10}  {'seconds':>8}  {'pages/s':>8}  {'chars':>10}  {'empty':>5}  {'similarity':>10}  {'worst':>6}  file")
+    for name in names:
+        outputs, start = {}, time.perf_counter()
+        for pdf in pdfs:
+            outputs[pdf] = extract_text_from_pdf(str(pdf), name)
+        elapsed = time.perf_counter() - start
+
+        counts = {pdf: words(text) for pdf, text in outputs.items()}
+        if not reference:
+            reference = counts
+        scores = {pdf: similarity(reference[pdf], counts[pdf]) for pdf in pdfs}
+        worst = min(scores, key=scores.get)
+        print(
+            f"{name:>10}  {elapsed:>8.2f}  {pages / elapsed:>8.1f}  {sum(map(len, outputs.values())):>10}"
+            f"  {sum(1 for text in outputs.values() if not text):>5}"
+            f"  {sum(scores.values()) / len(scores):>10.1%}  {scores[worst]:>6.1%}  {worst.name}"
+        )
+
+
+if __name__ == "__main__":
+    main()
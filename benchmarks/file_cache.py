@@ -0,0 +1,85 @@
+# Bytes saved by conditional GETs on /view:
+#
+#   python benchmarks/file_cache.py ./documents --views 1000 --revisit 0.6
+#   python benchmarks/file_cache.py ./documents --base-url http://127.0.0.1:8000
+#
+# Replays the same sequence of document views twice: once as a client without
+# a cache (every view downloads the whole PDF, as before ETags), once as a
+# browser that keeps the ETag of every PDF it has seen and revalidates it
+# (max-age expired), so revisits are answered with 304.
+# Without --base-url the app runs in-process with DOCUMENTS_DIR set to the
+# directory; no database is needed for /view.
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_client(directory: str, base_url: str):
+    if base_url:
+        import httpx
+
+        return httpx.Client(base_url=base_url, timeout=60)
+    os.environ["DOCUMENTS_DIR"] = directory
+    os.environ.setdefault("DATABASE_URL", "postgresql://docusearch@localhost/unused")
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app)
+
+
+def replay(client, views: list[str], conditional: bool):
+    """
+    :return: (bytes received, {status code: count}, seconds)
+    """
+    etags, received, statuses = {}, 0, {}
+    start = time.perf_counter()
+    for file_name in views:
+        headers = {"if-none-match": etags[file_name]} if conditional and file_name in etags else {}
+        response = client.get(f"/view/{quote(file_name)}", headers=headers)
+        received += len(response.content)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if "etag" in response.headers:
+            etags[file_name] = response.headers["etag"]
+    return received, statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the bytes conditional GETs save on /view")
+    parser.add_argument("pdf_directory")
+    parser.add_argument("--base-url", help="Running API; in-process when omitted")
+    parser.add_argument("--views", type=int, default=1000)
+    parser.add_argument("--revisit", type=float, default=0.6, help="Share of views of an already viewed PDF")
+    args = parser.parse_args()
+
+    names = sorted(pdf.name for pdf in Path(args.pdf_directory).glob("*.pdf"))
+    if not names:
+        raise SystemExit(f"No PDFs in {args.pdf_directory}")
+
+    random.seed(0)
+    views, seen = [], []
+    for _ in range(args.views):
+        name = random.choice(seen) if seen and random.random() < args.revisit else random.choice(names)
+        views.append(name)
+        if name not in seen:
+            seen.append(name)
+
+    client = make_client(os.path.realpath(args.pdf_directory), args.base_url)
+    print(f"{args.views} views of {len(seen)} distinct PDFs ({len(names)} in the directory)")
+    print(f"{'client':>12}  {'MiB':>9}  {'seconds':>8}  statuses")
+    baseline = None
+    for label, conditional in (("no cache", False), ("revalidating", True)):
+        received, statuses, elapsed = replay(client, views, conditional)
+        baseline = baseline or received
+        print(f"{label:>12}  {received / 2**20:>9.1f}  {elapsed:>8.2f}  {dict(sorted(statuses.items()))}")
+    print(f"Saved {1 - received / baseline:.1%} of the bytes")
+
+
+if __name__ == "__main__":
+    main()
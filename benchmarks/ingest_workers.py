@@ -0,0 +1,76 @@
+# Ingestion scaling with the number of worker processes:
+#
+#   python benchmarks/ingest_workers.py ./sample_pdfs --max-workers 8
+#
+# Every run ingests a fresh copy of the sample directory into the database of
+# DATABASE_URL (use a test database), then removes its documents again through
+# an ingestion run, so vocabulary counts are left as they were.
+# The OCR cache is disabled unless --ocr-cache is given; otherwise every run
+# after the first would only measure cache hits.
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed_run(sample: Path, workers: int, batch_size: int) -> tuple[float, dict]:
+    from app.utils import populate_database_from_pdfs
+
+    directory = tempfile.mkdtemp(prefix=f"ingest-bench-{workers}-")
+    try:
+        for pdf in sorted(sample.glob("*.pdf")):
+            shutil.copy2(pdf, directory)
+        start = time.perf_counter()
+        summary = populate_database_from_pdfs(directory, workers, batch_size)
+        elapsed = time.perf_counter() - start
+
+        for pdf in Path(directory).glob("*.pdf"):
+            pdf.unlink()
+        populate_database_from_pdfs(directory, 1, batch_size, allow_empty=True)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return elapsed, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time populate_database_from_pdfs with 1..N workers")
+    parser.add_argument("pdf_directory")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per worker count; the best one is kept")
+    parser.add_argument("--ocr-cache", action="store_true", help="Keep the OCR cache enabled")
+    args = parser.parse_args()
+
+    if not args.ocr_cache:
+        os.environ["OCR_CACHE_DIR"] = ""
+
+    sample = Path(args.pdf_directory)
+    pdfs = sorted(sample.glob("*.pdf"))
+    if not pdfs:
+        raise SystemExit(f"No PDFs in {sample}")
+    size = sum(pdf.stat().st_size for pdf in pdfs)
+    # Read the sample once so the first run does not pay for a cold page cache
+    for pdf in pdfs:
+        pdf.read_bytes()
+
+    print(f"{len(pdfs)} PDFs, {size / 2**20:.1f} MiB, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7}  {'seconds':>8}  {'files/s':>8}  {'speedup':>7}  {'efficiency':>10}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        elapsed, summary = min(
+            (timed_run(sample, workers, args.batch_size) for _ in range(args.repeat)), key=lambda run: run[0]
+        )
+        if summary["error"] or summary["added"] != len(pdfs):
+            print(f"Run with {workers} workers did not ingest every file: {summary}")
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>7}  {elapsed:>8.2f}  {len(pdfs) / elapsed:>8.1f}  {speedup:>6.2f}x  {speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
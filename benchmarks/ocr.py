@@ -0,0 +1,114 @@
+# OCR page rendering: pdf2image per page (before) vs in-process PyMuPDF:
+#
+#   python benchmarks/ocr.py --pages 40 --dpi 300
+#   python benchmarks/ocr.py --pages 40 --stub-tesseract 0.5    # no Tesseract needed
+#   python benchmarks/ocr.py --pdf ./scans/acta.pdf --threads 1,2,4
+#
+# Without --pdf, a PDF of generated Spanish text is rasterised into image-only
+# pages (no text layer), as a scanner would produce. The old extractor called
+# pdf2image.convert_from_path once per page, which starts pdftoppm and
+# re-parses the whole file every time, then ran Tesseract serially.
+# extract_ocr renders each page with PyMuPDF in-process and overlaps
+# Tesseract calls in a thread pool (OCR_THREADS).
+# --stub-tesseract replaces pytesseract.image_to_string with a sleep of that
+# many seconds per page (Tesseract is a subprocess, so it does not hold the
+# GIL either); 0 measures rendering alone. The OCR cache is disabled.
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ["OCR_CACHE_DIR"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+import pytesseract
+
+from app.config import OCR_LANGUAGE
+from app.extractors import PDFDocument, extract_ocr
+
+PARAGRAPH = (
+    "Convocatoria N° {page} del Consejo Universitario. Se comunica a los estudiantes de la Facultad "
+    "que el proceso de matrícula del semestre académico 2024-II se realizará conforme al reglamento "
+    "vigente, con la presentación de la constancia de pago y los créditos aprobados. "
+)
+
+
+def make_scanned_pdf(path: str, pages: int, dpi: int = 150):
+    """
+    Write a PDF whose pages are grayscale images of text, with no text layer.
+    """
+    source, scanned = fitz.open(), fitz.open()
+    for page_num in range(pages):
+        page = source.new_page()
+        page.insert_textbox(fitz.Rect(72, 72, 540, 770), PARAGRAPH.format(page=page_num + 1) * 6, fontsize=11)
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        image_page = scanned.new_page(width=page.rect.width, height=page.rect.height)
+        image_page.insert_image(image_page.rect, pixmap=pix)
+    scanned.save(path, deflate=True)
+
+
+def old_ocr(path: str, page_count: int, dpi: int):
+    """
+    OCR as the old extract_text_from_image did it, one pdf2image call per page.
+    """
+    from pdf2image import convert_from_path
+
+    for page_num in range(page_count):
+        for image in convert_from_path(path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1):
+            yield pytesseract.image_to_string(image, lang=OCR_LANGUAGE)
+
+
+def new_ocr(path: str, page_count: int, dpi: int, threads: int):
+    with PDFDocument(path) as document:
+        yield from extract_ocr(document, list(range(page_count)), dpi=dpi, threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pdf2image and PyMuPDF page rendering for OCR")
+    parser.add_argument("--pdf", help="Image-only PDF to OCR; a generated one when omitted")
+    parser.add_argument("--pages", type=int, default=20, help="Pages of the generated PDF")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--threads", default="1,2,4", help="Comma-separated OCR thread counts")
+    parser.add_argument("--stub-tesseract", type=float, metavar="SECONDS",
+                        help="Sleep this long per page instead of running Tesseract")
+    args = parser.parse_args()
+
+    if args.stub_tesseract is not None:
+        def image_to_string(image, lang=None):
+            time.sleep(args.stub_tesseract)
+            return ""
+
+        pytesseract.image_to_string = image_to_string
+        print(f"Tesseract stubbed: {args.stub_tesseract}s per page")
+    elif not shutil.which("tesseract"):
+        raise SystemExit("tesseract is not installed; use --stub-tesseract SECONDS")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.pdf
+        if not path:
+            path = os.path.join(directory, "scanned.pdf")
+            make_scanned_pdf(path, args.pages)
+        page_count = fitz.open(path).page_count
+        print(f"{page_count} pages of {os.path.basename(path)} ({os.path.getsize(path) / 2**20:.1f} MiB) at {args.dpi} dpi")
+
+        runs = [("pdf2image", lambda: old_ocr(path, page_count, args.dpi))]
+        runs += [
+            (f"pymupdf x{threads}", lambda threads=threads: new_ocr(path, page_count, args.dpi, threads))
+            for threads in map(int, args.threads.split(","))
+        ]
+        print(f"{'renderer':>12}  {'seconds':>8}  {'pages/s':>8}  {'chars':>8}")
+        for label, run in runs:
+            if label == "pdf2image" and not shutil.which("pdftoppm"):
+                print(f"{label:>12}  skipped: pdftoppm (poppler-utils) is not installed")
+                continue
+            start = time.perf_counter()
+            chars = sum(len(text) for text in run())
+            elapsed = time.perf_counter() - start
+            print(f"{label:>12}  {elapsed:>8.2f}  {page_count / elapsed:>8.1f}  {chars:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Snippet building cost per search result, old get_snippet vs app.snippets:
+#
+#   python benchmarks/snippets.py ./sample_pdfs --queries "convocatoria de becas,reglamento académico"
+#   python benchmarks/snippets.py ./sample_pdfs --repeat 20    # ~20x larger documents
+#
+# The old /search handler split the query on spaces and, for every term,
+# lowercased the whole document again and took 50 characters around its first
+# occurrence: content first, original_content if nothing matched. The new
+# path matches the analysed stems in content (str.find per term) and, only
+# for documents without a match there, the raw terms in original_content
+# (one accent insensitive regex per term over a text lowercased once). Both
+# make one pass per term; the new one avoids a lowercase copy per term and
+# keeps scanning to find the densest window instead of the first hit.
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.extractors import extract_text_from_pdf
+from app.search import analyze_query
+from app.snippets import highlight
+from app.utils import preprocess_text
+
+
+def old_snippet(content: str, original_content: str, terms: list[str]) -> str:
+    """
+    get_snippet as it was in main.py before app.snippets.
+    """
+    def find_snippet(source: str, terms: list[str]) -> str:
+        for term in terms:
+            index = source.lower().find(term.lower())
+            if index != -1:
+                start = max(index - 50, 0)
+                end = min(index + 50, len(source))
+                return source[start:end]
+        return None
+
+    return find_snippet(content, terms) or find_snippet(original_content, terms) or ""
+
+
+def new_snippet(content: str, original_content: str, stems: tuple, raw_terms: tuple):
+    """
+    The two passes of the /search handler for a single document.
+    """
+    return (stems and highlight(content, list(stems), analyzed=True)) or (
+        raw_terms and highlight(original_content, list(raw_terms))
+    )
+
+
+def timed(function, documents: list[tuple[str, str]], *args) -> tuple[float, int]:
+    """
+    :return: (seconds for every document, documents with a snippet)
+    """
+    start = time.perf_counter()
+    found = sum(1 for content, original_content in documents if function(content, original_content, *args))
+    return time.perf_counter() - start, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the old and new snippet builders")
+    parser.add_argument("pdf_directory")
+    parser.add_argument("--queries", default="convocatoria de becas,reglamento académico,la universidad 2024")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat every document's text this many times")
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.pdf_directory).glob("*.pdf"))
+    if not pdfs:
+        raise SystemExit(f"No PDFs in {args.pdf_directory}")
+    documents = []
+    for pdf in pdfs:
+        original_content = extract_text_from_pdf(str(pdf)) * args.repeat
+        documents.append((preprocess_text(original_content), original_content))
+    size = sum(len(original_content) for _, original_content in documents)
+    print(f"{len(documents)} documents, {size / len(documents) / 1024:.0f} KiB of text on average")
+
+    print(f"{'query':>30}  {'old ms/doc':>10}  {'new ms/doc':>10}  {'speedup':>7}  {'old hits':>8}  {'new hits':>8}")
+    for query in (query.strip() for query in args.queries.split(",")):
+        stems, raw_terms = analyze_query(query)
+        old_seconds, old_found = timed(old_snippet, documents, query.split())
+        new_seconds, new_found = timed(new_snippet, documents, stems, raw_terms)
+        print(
+            f"{query[:30]:>30}  {old_seconds / len(documents) * 1000:>10.2f}  {new_seconds / len(documents) * 1000:>10.2f}"
+            f"  {old_seconds / new_seconds:>6.1f}x  {old_found:>8}  {new_found:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
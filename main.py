@@ -1,14 +1,30 @@
+import datetime
 import os
-from fastapi import FastAPI, Query, Depends, HTTPException
+from fastapi import FastAPI, Query, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from app.config import engine, Base, SessionLocal
-from app.models import PDFFile
-from app.utils import backfill_document_dates, populate_database_from_pdfs
+from app.config import (
+    engine, Base, SessionLocal, AsyncSessionLocal, SEARCH_BACKEND, BM25_INDEX_PATH, GENERATION_POLL_SECONDS,
+    SEARCH_CACHE_BACKEND, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, SEARCH_CACHE_DIR, SEARCH_RAW_FALLBACK,
+    SEARCH_STATEMENT_TIMEOUT_MS, AUTOCOMPLETE_STATEMENT_TIMEOUT_MS,
+)
+from app import autocomplete
+from app.cache import cache_key, make_cache
+from app.generation import latest_generation, start_watcher
+from app.bm25 import BM25Index
+from app.files import pdf_response
+from app.models import PDFFile, SEARCH_CONFIG
+from app.snippets import highlight
+from app.search import (
+    RAW_COLUMNS, STEMMED_COLUMNS, analyze_query, decode_cursor, encode_cursor, keyset_filter,
+    substring_rank, websearch_terms,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from urllib.parse import unquote
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeout
 from sqlalchemy.sql import text
+from sqlalchemy.types import REAL
 
 
 app = FastAPI()
@@ -23,58 +39,131 @@ app.add_middleware(
 
 #TESTING!
 
-def get_db():
-    db = SessionLocal()
+# In-process BM25 index of this worker
+bm25_index = None
+
+
+def get_bm25_index():
+    """
+    The BM25 index, remapped whenever the file is rebuilt (new inode or
+    mtime), so new and deleted documents show up without a restart.
+    Searches already running keep the mapping they started with.
+    """
+    global bm25_index
     try:
-        yield db
-    finally:
-        db.close()
+        stat_result = os.stat(BM25_INDEX_PATH)
+    except OSError:
+        return bm25_index
+    if bm25_index is None or bm25_index.identity != (stat_result.st_ino, stat_result.st_mtime_ns):
+        bm25_index = BM25Index(BM25_INDEX_PATH)
+    return bm25_index
+
+
+# /search response cache; keys include the ingestion generation
+search_cache = make_cache(SEARCH_CACHE_BACKEND, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, SEARCH_CACHE_DIR)
+
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+class RequestSession:
+    """
+    Database access for one request, with the awaitable `execute` of
+    AsyncSession in both modes: in sync mode the blocking psycopg2 call runs
+    on the threadpool, so handlers are written once.
+    The endpoint's statement_timeout is set for the transaction before the
+    first query; requests answered without the database never touch it.
+    """
+
+    def __init__(self, session, statement_timeout_ms: int):
+        self.session = session
+        self.statement_timeout_ms = statement_timeout_ms
+        self._timeout_set = not statement_timeout_ms
+
+    async def _execute(self, statement, params=None):
+        if AsyncSessionLocal is not None:
+            return await self.session.execute(statement, params)
+        return await run_in_threadpool(self.session.execute, statement, params)
+
+    async def execute(self, statement):
+        try:
+            if not self._timeout_set:
+                await self._execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {"timeout": str(self.statement_timeout_ms)},
+                )
+                self._timeout_set = True
+            return await self._execute(statement)
+        except DBAPIError as e:
+            if getattr(e.orig, "pgcode", None) == QUERY_CANCELED:
+                raise HTTPException(status_code=503, detail="The query took too long, please refine the search")
+            raise
+        except PoolTimeout:
+            raise HTTPException(status_code=503, detail="The database is busy, please retry")
+
+
+def get_db(statement_timeout_ms: int = 0):
+    """
+    Dependency yielding a RequestSession: an AsyncSession on asyncpg when
+    DB_MODE=async, otherwise a psycopg2 session.
+    :param statement_timeout_ms: Query budget of the endpoint (0 for none).
+    """
+    async def dependency():
+        if AsyncSessionLocal is not None:
+            async with AsyncSessionLocal() as db:
+                yield RequestSession(db, statement_timeout_ms)
+            return
+        db = SessionLocal()
+        try:
+            yield RequestSession(db, statement_timeout_ms)
+        finally:
+            await run_in_threadpool(db.close)
+
+    return dependency
+
 
 @app.on_event("startup")
 def startup_event():
     """
     Start-up event to create database tables and populate data.
     """
+    if SEARCH_BACKEND == "bm25":
+        get_bm25_index()
+    # Track the ingestion generation: reloads the in-memory autocomplete index
+    # and moves /search to fresh cache keys whenever new data is committed
+    start_watcher(GENERATION_POLL_SECONDS, on_change=autocomplete.refresh_index)
     # Create tables
     # Base.metadata.create_all(bind=engine)
     # print("Database tables created successfully!")
 
-    # # Populate the database with PDFs (adjust the directory path as needed)
-    # pdf_directory = "./documents"  # Replace with the actual path to your PDFs
-    # populate_database_from_pdfs(pdf_directory)
-
-    # print("Running backfill...")
-    # backfill_document_dates()
-    # print("Backfill complete!")
+    # Ingestion runs outside the API workers, so they never import the PDF,
+    # OCR or NLTK stack:
+    #   python -m app.ingest setup
+    #   python -m app.ingest run ./documents
+    #   python -m app.ingest backfill-dates
+    #   python -m app.ingest rebuild-vocabulary
 
 @app.get("/autocomplete")
-def autocomplete_suggestions(
+async def autocomplete_suggestions(
     query: str = Query(..., min_length=1),
-    db: Session = Depends(get_db)
+    limit: int = Query(5, ge=1, le=autocomplete.MAX_SUGGESTIONS, description="Number of suggestions"),
+    db=Depends(get_db(AUTOCOMPLETE_STATEMENT_TIMEOUT_MS))
 ):
     """
-    Returns search term suggestions extracted from PDF content.
+    Returns the most frequent vocabulary terms starting with the query.
     """
     if not query:
         return {"suggestions": []}
 
-    # Custom raw SQL query to extract words
-    sql_query = text("""
-        SELECT DISTINCT word
-        FROM (
-            SELECT unnest(string_to_array(content, ' ')) AS word
-            FROM pdf_files
-            WHERE content ILIKE :query
-        ) subquery
-        WHERE word ILIKE :query
-        LIMIT 5
-    """)
+    # Answered from memory when the in-process index is loaded
+    index = autocomplete.get_index()
+    if index is not None:
+        return {"suggestions": index.suggest(query, limit)}
 
+    result = await db.execute(autocomplete.prefix_query(query, limit))
 
-    result = db.execute(sql_query, {"query": f"%{query}%"}).fetchall()
-
-  
-    suggestions = [row[0] for row in result]
+    suggestions = [row.term for row in result]
 
     return {"suggestions": suggestions}
 
@@ -83,132 +172,190 @@ def read_root():
     return {"message": "Welcome to the University PDF Search Engine"}
 
 from sqlalchemy import or_
-from sqlalchemy.sql.expression import true
+from sqlalchemy.sql.expression import null, true
 @app.get("/search")
-def search_pdfs(
+async def search_pdfs(
     query: str = Query(None, description="Search term for PDFs"),
     exact_match: bool = Query(False, description="Search for exact matches"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Number of results per page"),
     start_date: str = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: str = Query(None, description="End date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    cursor: str = Query(None, description="Opaque cursor from a previous response's next_cursor; takes precedence over page"),
+    mode: str = Query(SEARCH_BACKEND, pattern="^(fts|ilike|bm25)$", description="Search engine: 'fts' (full-text), 'ilike' (legacy substring scan) or 'bm25' (in-process index)"),
+    raw_fallback: bool = Query(SEARCH_RAW_FALLBACK, description="ilike mode: search the original text when the stemmed text has no match"),
+    db=Depends(get_db(SEARCH_STATEMENT_TIMEOUT_MS))
 ):
-   
+    # Skip the cache until the generation is known, so stale pages are never served
+    generation = latest_generation()
+    key = None
+    if search_cache is not None and generation is not None:
+        # The BM25 file is rebuilt after the generation moves; key on the mapped file too
+        index = get_bm25_index() if mode == "bm25" else None
+        key = cache_key(
+            generation, query=query, exact_match=exact_match, page=page, page_size=page_size,
+            start_date=start_date, end_date=end_date, cursor=cursor, mode=mode, raw_fallback=raw_fallback,
+            bm25_index=index.identity if index is not None else None,
+        )
+        cached = search_cache.get(key)
+        if cached is not None:
+            return cached
+
+    # Parsed here so every driver receives real dates (asyncpg does not cast strings)
+    try:
+        start = datetime.date.fromisoformat(start_date) if start_date else None
+        end = datetime.date.fromisoformat(end_date) if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     def apply_date_filters(query_filter):
-        if start_date:
-            query_filter &= PDFFile.document_date >= start_date
-        if end_date:
-            query_filter &= PDFFile.document_date <= end_date
+        if start:
+            query_filter &= PDFFile.document_date >= start
+        if end:
+            query_filter &= PDFFile.document_date <= end
         return query_filter
     
+    async def fetch_page(search_filter, rank=None):
+        """
+        Fetch one page in the database; the total comes from a window count
+        over the same query so only `page_size` rows ever reach Python.
+        With a cursor the page is located by keyset instead of OFFSET and
+        the total is not computed.
+        """
+        search_filter = apply_date_filters(search_filter)
+        order_by = [PDFFile.document_date.desc().nulls_last(), PDFFile.id]
+        if rank is not None:
+            order_by.insert(0, rank.desc())
+        columns = [PDFFile, (rank if rank is not None else null()).label("rank")]
+
+        if cursor:
+            try:
+                page_filter = search_filter & keyset_filter(rank, cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            result = await db.execute(select(*columns).where(page_filter).order_by(*order_by).limit(page_size))
+            rows = result.all()
+            total_results = None
+        else:
+            columns.append(func.count().over().label("total_results"))
+            result = await db.execute(
+                select(*columns)
+                .where(search_filter)
+                .order_by(*order_by)
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+            rows = result.all()
+            if rows:
+                total_results = rows[0].total_results
+            elif page == 1:
+                total_results = 0
+            else:
+                # Page past the end: the window count saw no rows, count separately
+                total_results = (await db.execute(select(func.count(PDFFile.id)).where(search_filter))).scalar()
+
+        next_cursor = None
+        if len(rows) == page_size:
+            last = rows[-1]
+            next_cursor = encode_cursor(last.rank, last.PDFFile.document_date, last.PDFFile.id)
+        return total_results, [row.PDFFile for row in rows], next_cursor
+
     # Si no hay query, solo buscar por fechas
     if not query:
-        date_filter = apply_date_filters(true())  # Comenzamos con True para no afectar el filtro
-        date_results = db.query(PDFFile).filter(date_filter).all()
-
-        total_results = len(date_results)
-        paginated_results = date_results[(page - 1) * page_size: page * page_size]
-
-        return {
-            "page": page,
-            "page_size": page_size,
-            "total_results": total_results,
-            "results": [
-                {
-                    "file_name": pdf.file_name,
-                    "file_path": pdf.file_path,
-                    "snippet": "",  # No hay snippet si no hay query
-                }
-                for pdf in paginated_results
-            ],
-        }
-
-    terms = query.split()
-
-    
-
-    if exact_match:
-        exact_filter = or_(
-            PDFFile.content == query,
-            PDFFile.original_content == query
+        stems, raw_terms = (), ()  # No hay snippet si no hay query
+        total_results, paginated_results, next_cursor = await fetch_page(true())  # Comenzamos con True para no afectar el filtro
+    elif mode == "fts":
+        # Snippets highlight what the documents must contain, analysed like the ilike path
+        stems, raw_terms = analyze_query(websearch_terms(query))
+        # Full-text search over the GIN-indexed tsvector column.
+        # websearch_to_tsquery accepts "phrases", OR and -exclusions from the user.
+        phrase = query.replace('"', '')
+        fts_query = f'"{phrase}"' if exact_match else query
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, fts_query)
+        rank = func.ts_rank_cd(PDFFile.search_vector, ts_query, type_=REAL)
+        total_results, paginated_results, next_cursor = await fetch_page(PDFFile.search_vector.op("@@")(ts_query), rank)
+    elif mode == "bm25":
+        stems, raw_terms = analyze_query(query)
+        # In-process BM25 over the stemmed tokens; the database only hydrates the page
+        index = get_bm25_index()
+        if index is None:
+            raise HTTPException(status_code=503, detail="BM25 index is not available")
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Scoring is CPU-bound; keep it off the event loop
+        total_results, hits = await run_in_threadpool(
+            index.search, list(stems), page_size, (page - 1) * page_size, start, end, after
         )
+        result = await db.execute(select(PDFFile).where(PDFFile.id.in_([hit[0] for hit in hits])))
+        pdfs = {pdf.id: pdf for pdf in result.scalars()}
+        paginated_results = [pdfs[pdf_id] for pdf_id, _, _ in hits if pdf_id in pdfs]
+        if cursor:
+            total_results = None
+        else:
+            # Documents deleted since the index was last rebuilt
+            total_results -= len(hits) - len(paginated_results)
+        next_cursor = None
+        if len(hits) == page_size:
+            pdf_id, score, document_date = hits[-1]
+            next_cursor = encode_cursor(score, document_date, pdf_id)
     else:
-        exact_filter = or_(
-            PDFFile.content.ilike(f"%{query}%"),
-            PDFFile.original_content.ilike(f"%{query}%")
-        )
-    exact_filter = apply_date_filters(exact_filter)
-    exact_results = db.query(PDFFile).filter(exact_filter).all()
-
-    first_term_filter = or_(
-        PDFFile.content.ilike(f"%{terms[0]}%"),
-        PDFFile.original_content.ilike(f"%{terms[0]}%")
-    )
-    first_term_filter = apply_date_filters(first_term_filter)
-    first_term_results = db.query(PDFFile).filter(first_term_filter).all()
-
-    subsequent_terms_results = []
-    if len(terms) > 1:
-        subsequent_terms_filter = or_(
-            or_(
-                PDFFile.content.ilike(f"%{term}%"),
-                PDFFile.original_content.ilike(f"%{term}%")
+        # ILIKE path: exact > first term > other terms as a SQL rank expression.
+        # The query is analysed like the documents: stopwords never become
+        # filters and the stems are matched against the stemmed `content`.
+        stems, raw_terms = analyze_query(query)
+        total_results, paginated_results, next_cursor = 0, [], None
+        stemmed_filter = None
+        if stems:
+            stemmed_filter, rank = substring_rank(" ".join(stems), list(stems), exact_match, STEMMED_COLUMNS)
+            total_results, paginated_results, next_cursor = await fetch_page(stemmed_filter, rank)
+
+        # Raw text only when the stemmed search found nothing at all
+        if raw_fallback and raw_terms and not paginated_results and (
+            stemmed_filter is None
+            or total_results == 0
+            or (cursor and (await db.execute(
+                select(PDFFile.id).where(apply_date_filters(stemmed_filter)).limit(1)
+            )).first() is None)
+        ):
+            search_filter, rank = substring_rank(query, list(raw_terms), exact_match, RAW_COLUMNS)
+            total_results, paginated_results, next_cursor = await fetch_page(search_filter, rank)
+
+    # The listing above loads metadata only; fetch the text for this page's
+    # snippets: the stems in the processed content first, and the raw terms in
+    # the raw text only for the documents the content has no match in
+    snippets = {}
+    missing = [pdf.id for pdf in paginated_results]
+    for column, terms, analyzed in ((PDFFile.content, stems, True), (PDFFile.original_content, raw_terms, False)):
+        if terms and missing:
+            rows = (await db.execute(select(PDFFile.id, column).where(PDFFile.id.in_(missing)))).all()
+            # Highlighting scans whole documents; run it on the threadpool, not the event loop
+            found = await run_in_threadpool(
+                lambda: {row[0]: highlight(row[1], list(terms), analyzed=analyzed) for row in rows}
             )
-            for term in terms[1:]
-        )
-        subsequent_terms_filter = apply_date_filters(subsequent_terms_filter)
-        subsequent_terms_results = db.query(PDFFile).filter(subsequent_terms_filter).all()
-
-
-    unique_results = {pdf.id: pdf for pdf in exact_results}  
-    for pdf in first_term_results:
-        unique_results.setdefault(pdf.id, pdf)
-    for pdf in subsequent_terms_results:
-        unique_results.setdefault(pdf.id, pdf)
-
-  
-    all_results = list(unique_results.values())
-    total_results = len(all_results)
-    paginated_results = all_results[(page - 1) * page_size: page * page_size]
-
-   
-    def get_snippet(pdf: PDFFile, terms: list[str]) -> str:
-       
-        def find_snippet(source: str, terms: list[str]) -> str:
-            for term in terms:
-                index = source.lower().find(term.lower())
-                if index != -1:
-                    start = max(index - 50, 0)
-                    end = min(index + 50, len(source))
-                    return source[start:end]
-            return None
-
-     
-        snippet = find_snippet(pdf.content, terms)
-        if snippet:
-            return snippet
-
-
-        snippet = find_snippet(pdf.original_content, terms)
-        if snippet:
-            return snippet
-
-        return "" 
-
-    return {
+            snippets.update((pdf_id, snippet) for pdf_id, snippet in found.items() if snippet)
+            missing = [pdf_id for pdf_id in missing if pdf_id not in snippets]
+
+    response = {
         "page": page,
         "page_size": page_size,
         "total_results": total_results,
+        "next_cursor": next_cursor,
         "results": [
             {
                 "file_name": pdf.file_name,
                 "file_path": pdf.file_path,
-                "snippet": get_snippet(pdf, terms),
+                "snippet": snippets.get(pdf.id, ("", []))[0],
+                "highlights": snippets.get(pdf.id, ("", []))[1],
             }
             for pdf in paginated_results
         ],
     }
+    if key is not None:
+        search_cache.set(key, response)
+    return response
 
 
 
@@ -216,31 +363,11 @@ def search_pdfs(
 
 
 @app.get("/download/{file_name}", response_class=FileResponse)
-def download_file(file_name: str):
-  
-    decoded_file_name = unquote(file_name)
-    file_path = os.path.join("./documents", decoded_file_name)
-
-    if not os.path.exists(file_path):
-        print(f"DEBUG: File not found at {file_path}")  # Log the file path for debugging
-        raise HTTPException(status_code=404, detail="File not found")
-
-    print(f"DEBUG: Serving file {file_path}")  # Log successful file path
-    return FileResponse(file_path, media_type="application/pdf", filename=decoded_file_name)
+def download_file(file_name: str, request: Request):
+    return pdf_response(request, unquote(file_name), inline=False)
 
 
 @app.get("/view/{file_name}")
-def view_pdf(file_name: str):
+def view_pdf(file_name: str, request: Request):
     # Decodificar correctamente el nombre del archivo
-    decoded_file_name = unquote(file_name)
-    print(f"DEBUG: Decoded file name: {decoded_file_name}")
-
-    file_path = os.path.abspath(os.path.join("./documents", decoded_file_name))
-
-    if not os.path.exists(file_path):
-        print(f"DEBUG: File not found at {file_path}")
-        raise HTTPException(status_code=404, detail="File not found")
-
-    print(f"DEBUG: Serving file {file_path}")
-
-    return FileResponse(file_path, media_type="application/pdf", headers={"Content-Disposition": "inline"})
\ No newline at end of file
+    return pdf_response(request, unquote(file_name), inline=True)
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+# app.config reads DATABASE_URL at import time. Tests that touch the database
+# run migrations and rewrite tables, so they only ever use a dedicated
+# TEST_DATABASE_URL; otherwise DATABASE_URL points at an address that is
+# never connected to, whatever the shell or .env says.
+if os.getenv("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+else:
+    os.environ["DATABASE_URL"] = "postgresql://docusearch@localhost/docusearch_tests_disabled"
+
+
+
+@pytest.fixture(scope="session")
+def analyzer():
+    """
+    The Spanish analyzer; skips the test when the NLTK stopwords are not
+    installed (`python -m app.ingest setup`).
+    """
+    from app.analyzer import get_analyzer
+
+    try:
+        return get_analyzer()
+    except RuntimeError as e:
+        pytest.skip(str(e))
@@ -0,0 +1,98 @@
+import pytest
+
+from app.analyzer import Analyzer
+
+
+class CountingStemmer:
+    """
+    Stand-in for SnowballStemmer: keeps the first four characters and counts
+    the calls, so the memo can be observed.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def stem(self, word: str) -> str:
+        self.calls.append(word)
+        return word[:4]
+
+
+@pytest.fixture
+def stemmer():
+    return CountingStemmer()
+
+
+@pytest.mark.parametrize("text, terms", [
+    ("Convocatoria de la Universidad", ["conv", "univ"]),
+    ("DE LA De la", []),
+    ("", []),
+    # Digits are terms; symbols around them are not
+    ("Resolución N° 15 del 2024", ["reso", "n", "15", "2024"]),
+    ("3,5 créditos", ["3", "5", "créd"]),
+    # Hyphens, underscores and slashes split words
+    ("socio-económico", ["soci", "econ"]),
+    ("expediente 15-2024/B", ["expe", "15", "2024", "b"]),
+    ("nombre_archivo", ["nomb", "arch"]),
+])
+def test_terms(stemmer, text, terms):
+    analyzer = Analyzer({"de", "la", "del"}, stemmer)
+
+    assert analyzer.terms(text) == terms
+    assert analyzer.analyze(text) == " ".join(terms)
+
+
+def test_stopwords_never_reach_the_stemmer(stemmer):
+    analyzer = Analyzer({"de", "la"}, stemmer)
+
+    assert analyzer.stem("de") is None
+    assert analyzer.terms("La universidad de la ciudad") == ["univ", "ciud"]
+    assert stemmer.calls == ["universidad", "ciudad"]
+
+
+def test_stems_are_memoised(stemmer):
+    analyzer = Analyzer(set(), stemmer)
+
+    analyzer.terms("becas Becas BECAS becas")
+
+    assert stemmer.calls == ["becas"]
+
+
+def test_memo_is_cleared_at_memo_size(stemmer):
+    analyzer = Analyzer(set(), stemmer, memo_size=2)
+
+    analyzer.terms("uno dos")
+    analyzer.terms("uno dos")
+    assert stemmer.calls == ["uno", "dos"]
+
+    # The third distinct word finds the memo full: it starts over
+    analyzer.terms("tres")
+    assert len(analyzer._memo) == 1
+    analyzer.terms("uno")
+    assert stemmer.calls == ["uno", "dos", "tres", "uno"]
+
+
+def test_analyze_many(stemmer):
+    analyzer = Analyzer({"de"}, stemmer)
+
+    assert analyzer.analyze_many(["página de prueba", "", "otra"]) == ["pági prue", "", "otra"]
+
+
+# The real Spanish analyzer (NLTK stopwords and Snowball stemmer)
+
+def test_spanish_stems_ignore_case_and_acute_accents(analyzer):
+    assert analyzer.terms("Crédito credito CRÉDITO") == ["credit"] * 3
+    assert analyzer.terms("el de la y los") == []
+
+
+@pytest.mark.parametrize("text", [
+    "Convocatoria de becas para la Universidad",
+    "Reglamento académico N° 15-2024, artículo décimo.",
+    "¿Cuándo abre la matrícula del semestre 2024-II?",
+    "Resolución rectoral: créditos y calificaciones",
+])
+def test_ingestion_and_queries_share_the_analysis(analyzer, text):
+    from app.search import analyze_query
+    from app.utils import preprocess_text
+
+    # Queries drop repeated terms; none of these texts repeats one
+    assert preprocess_text(text) == " ".join(analyze_query(text)[0])
@@ -0,0 +1,84 @@
+import datetime
+import os
+
+import pytest
+
+# DB_MODE=async against the dedicated test database: the endpoints run on an
+# AsyncSession (asyncpg) instead of psycopg2 on the threadpool
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL environment variable is not set"
+)
+
+FILE_PATH = "/tests/async/convocatoria-asincrona.pdf"
+
+
+@pytest.fixture(scope="module")
+def client():
+    pytest.importorskip("asyncpg")
+    from fastapi.testclient import TestClient
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    import main
+    from app.config import ASYNC_DATABASE_URL, SessionLocal
+    from app.migrations import run_migrations
+    from app.models import PDFFile
+    from app.utils import insert_pdf_rows
+
+    run_migrations()
+    db = SessionLocal()
+    db.query(PDFFile).filter(PDFFile.file_path == FILE_PATH).delete()
+    insert_pdf_rows(db, [{
+        "file_name": os.path.basename(FILE_PATH), "file_path": FILE_PATH,
+        "content": "convocatori asincron", "original_content": "Convocatoria asíncrona",
+        "document_date": datetime.date(2024, 3, 5), "file_size": 1, "file_mtime": 0.0, "content_hash": None,
+    }])
+    db.commit()
+
+    engine = create_async_engine(ASYNC_DATABASE_URL)
+    previous = main.AsyncSessionLocal
+    main.AsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    try:
+        # One event loop for every request, as under uvicorn
+        with TestClient(main.app) as test_client:
+            yield test_client
+            test_client.portal.call(engine.dispose)
+    finally:
+        main.AsyncSessionLocal = previous
+        db.query(PDFFile).filter(PDFFile.file_path == FILE_PATH).delete()
+        db.commit()
+        db.close()
+
+
+def test_async_search_with_date_filters(client):
+    response = client.get("/search", params={
+        "query": "asíncrona", "mode": "fts", "start_date": "2024-03-01", "end_date": "2024-03-31",
+    })
+
+    assert response.status_code == 200
+    assert [result["file_path"] for result in response.json()["results"]] == [FILE_PATH]
+
+
+def test_async_search_cursor(client):
+    first = client.get("/search", params={"query": "convocatoria asíncrona", "mode": "fts", "page_size": 1}).json()
+    assert first["results"] and first["next_cursor"]
+
+    second = client.get("/search", params={
+        "query": "convocatoria asíncrona", "mode": "fts", "page_size": 1, "cursor": first["next_cursor"],
+    })
+    assert second.status_code == 200
+    assert FILE_PATH not in [result["file_path"] for result in second.json()["results"]]
+
+
+def test_async_statement_timeout_is_a_503(client):
+    from fastapi import HTTPException
+    from sqlalchemy import text
+
+    import main
+
+    async def slow_query():
+        async with main.AsyncSessionLocal() as session:
+            await main.RequestSession(session, statement_timeout_ms=50).execute(text("SELECT pg_sleep(1)"))
+
+    with pytest.raises(HTTPException) as error:
+        client.portal.call(slow_query)
+    assert error.value.status_code == 503
@@ -0,0 +1,87 @@
+import pytest
+
+from app.autocomplete import MAX_SUGGESTIONS, SHORT_PREFIX_LENGTH, PrefixIndex
+from app.snippets import fold
+
+ROWS = [
+    ("crédito", 50),
+    ("créditos", 80),
+    ("credencial", 80),
+    ("criterio", 10),
+    ("cronograma", 30),
+    ("calendario", 70),
+    ("niño", 5),
+    ("nivel", 9),
+    ("académico", 40),
+    ("acta", 40),
+    ("actas", 20),
+]
+
+
+@pytest.fixture
+def index():
+    return PrefixIndex(ROWS, generation=3)
+
+
+def expected(rows, prefix: str, limit: int) -> list[str]:
+    """
+    Brute-force reference: terms whose folded form starts with the folded
+    prefix, most frequent first; ties keep the index order (folded term, term).
+    """
+    key = fold(prefix.strip())
+    matches = sorted((fold(term), term, freq) for term, freq in rows if fold(term).startswith(key))
+    return [term for _, term, _ in sorted(matches, key=lambda entry: -entry[2])][:limit]
+
+
+@pytest.mark.parametrize("prefix, suggestions", [
+    ("credito", ["créditos", "crédito"]),
+    ("CRÉDITO", ["créditos", "crédito"]),
+    ("nino", ["niño"]),
+    ("academ", ["académico"]),
+    ("  cred ", ["credencial", "créditos", "crédito"]),
+    ("xyz", []),
+])
+def test_folds_case_and_accents(index, prefix, suggestions):
+    assert index.suggest(prefix, limit=10) == suggestions
+
+
+@pytest.mark.parametrize("prefix", ["", "   ", "\t\n"])
+def test_empty_prefix(index, prefix):
+    assert index.suggest(prefix) == []
+
+
+def test_ranks_by_frequency(index):
+    # Frequency first; equal frequencies in folded alphabetical order
+    assert index.suggest("c", limit=10) == [
+        "credencial", "créditos", "calendario", "crédito", "cronograma", "criterio",
+    ]
+    assert index.suggest("act") == ["acta", "actas"]
+    assert index.suggest("a") == ["académico", "acta", "actas"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 50])
+def test_limit(index, limit):
+    for prefix in ("c", "cr", "cre", "cred"):
+        suggestions = index.suggest(prefix, limit=limit)
+        assert suggestions == expected(ROWS, prefix, limit)
+        assert len(suggestions) <= limit
+
+
+def test_short_and_long_prefixes_agree():
+    # More terms per short prefix than the precomputed lists keep
+    rows = [(f"ca{chr(ord('a') + n % 26)}{n:02d}", (n * 37) % 50) for n in range(60)]
+    rows += [("cá", 100), ("cb", 1), ("c", 2)]
+    index = PrefixIndex(rows, generation=1)
+
+    for prefix in ("c", "C", "ca", "cá", "cab", "caa0", "cb", "cz"):
+        for limit in (1, 5, MAX_SUGGESTIONS):
+            assert index.suggest(prefix, limit=limit) == expected(rows, prefix, limit), (prefix, limit)
+    assert len(index.suggest("c", limit=MAX_SUGGESTIONS)) == MAX_SUGGESTIONS
+    assert all(len(prefix) <= SHORT_PREFIX_LENGTH for prefix in index._short)
+
+
+def test_empty_vocabulary():
+    index = PrefixIndex([], generation=0)
+
+    assert index.suggest("c") == []
+    assert index.suggest("cred") == []
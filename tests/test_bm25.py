@@ -0,0 +1,142 @@
+import datetime
+
+import pytest
+
+from app import bm25
+from app.bm25 import BM25Index, build_index
+from app.search import decode_cursor, encode_cursor
+
+MARCH = datetime.date(2024, 3, 1)
+MAY = datetime.date(2023, 5, 1)
+
+# (id, content, document_date); every document has two tokens, so documents
+# with the same term frequency tie on score
+ROWS = [
+    (1, "bec univers", MAY),
+    (2, "bec univers", None),
+    (3, "bec univers", MARCH),
+    (4, "bec univers", None),
+    (5, "bec univers", MARCH),
+    (6, "bec bec", None),
+    (7, "univers reglament", MARCH),
+]
+# Score DESC, then document_date DESC NULLS LAST, then id
+ORDER = [6, 3, 5, 1, 2, 4]
+
+
+class FakeSession:
+    """
+    The part of a Session build_index uses: query(...).order_by(...).yield_per(...).
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, *columns):
+        return self
+
+    def order_by(self, *clauses):
+        return self
+
+    def yield_per(self, count):
+        return iter(sorted(self.rows))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    path = str(tmp_path / "bm25.idx")
+
+    def build(rows=ROWS) -> BM25Index:
+        monkeypatch.setattr(bm25, "SessionLocal", lambda: FakeSession(rows))
+        build_index(path)
+        return BM25Index(path)
+
+    return build
+
+
+def test_ordering(build):
+    total, hits = build().search(["bec"], limit=10)
+
+    assert total == len(ORDER)
+    assert [pdf_id for pdf_id, _, _ in hits] == ORDER
+    scores = [score for _, score, _ in hits]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[1] == scores[-1]  # The ties the dates and ids break
+    assert hits[0][2] is None and hits[1][2] == MARCH
+
+
+def test_offset(build):
+    index = build()
+
+    assert [hit[0] for hit in index.search(["bec"], limit=2, offset=2)[1]] == ORDER[2:4]
+    assert index.search(["bec"], limit=2, offset=10) == (len(ORDER), [])
+
+
+def test_unknown_terms(build):
+    index = build()
+
+    assert index.search(["inexistent"], limit=10) == (0, [])
+    assert index.search([], limit=10) == (0, [])
+    assert [hit[0] for hit in index.search(["bec", "inexistent"], limit=10)[1]] == ORDER
+
+
+@pytest.mark.parametrize("start_date, end_date, ids", [
+    (datetime.date(2024, 1, 1), None, [3, 5]),
+    (None, datetime.date(2023, 12, 31), [1]),
+    (MAY, MARCH, [3, 5, 1]),
+    (MARCH, MARCH, [3, 5]),
+    (datetime.date(2025, 1, 1), None, []),
+])
+def test_date_filters_exclude_undated_documents(build, start_date, end_date, ids):
+    total, hits = build().search(["bec"], limit=10, start_date=start_date, end_date=end_date)
+
+    assert total == len(ids)
+    assert [pdf_id for pdf_id, _, _ in hits] == ids
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 4])
+def test_cursor_pages_continue_the_ordering(build, page_size):
+    index = build()
+
+    seen, after = [], None
+    while True:
+        # The offset is ignored once there is a cursor
+        total, hits = index.search(["bec"], limit=page_size, offset=0 if after is None else 99, after=after)
+        assert total == len(ORDER)  # Matches before the cursor still count
+        if not hits:
+            break
+        seen += [pdf_id for pdf_id, _, _ in hits]
+        # Through the opaque cursor /search hands out, as main.py builds it
+        pdf_id, score, document_date = hits[-1]
+        after = decode_cursor(encode_cursor(score, document_date, pdf_id))
+        assert after == (score, document_date, pdf_id)
+
+    assert seen == ORDER
+
+
+def test_empty_index(build):
+    index = build([])
+
+    assert index.n_docs == 0
+    assert index.search(["bec"], limit=10) == (0, [])
+
+
+def test_rebuilt_index_has_a_new_identity(build):
+    first = build()
+    second = build(ROWS + [(8, "bec bec", MARCH)])
+
+    assert second.identity != first.identity
+    assert second.search(["bec"], limit=1)[1][0][0] == 8
+    # The mapping of the replaced file stays readable
+    assert first.search(["bec"], limit=1)[1][0][0] == 6
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-an-index"
+    path.write_bytes(b"x" * 200)
+
+    with pytest.raises(ValueError):
+        BM25Index(str(path))
@@ -0,0 +1,234 @@
+import datetime
+import json
+import os
+import time
+
+import pytest
+
+from app import cache
+from app.cache import FileCache, MemoryCache, cache_key, make_cache
+
+
+class Clock:
+    """
+    Stands in for the `time` module in app.cache.
+    """
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def entry_names(directory) -> set:
+    return {name for name in os.listdir(directory) if name.endswith(".json")}
+
+
+def age(file_cache: FileCache, key: str, seconds_ago: float):
+    """
+    Set the last access time of an entry.
+    """
+    timestamp = time.time() - seconds_ago
+    os.utime(file_cache._path(key), (timestamp, timestamp))
+
+
+# MemoryCache
+
+def test_memory_cache_round_trip():
+    memory_cache = MemoryCache(max_entries=10, ttl=60)
+
+    assert memory_cache.get("a") is None
+    memory_cache.set("a", {"results": [1]})
+    assert memory_cache.get("a") == {"results": [1]}
+    memory_cache.set("a", {"results": [2]})
+    assert memory_cache.get("a") == {"results": [2]}
+
+
+def test_memory_cache_ttl(clock):
+    memory_cache = MemoryCache(max_entries=10, ttl=60)
+    memory_cache.set("a", 1)
+
+    clock.now += 60
+    assert memory_cache.get("a") == 1
+    clock.now += 1
+    assert memory_cache.get("a") is None
+    assert not memory_cache._entries  # Expired entries are dropped on read
+
+
+def test_memory_cache_evicts_least_recently_used():
+    memory_cache = MemoryCache(max_entries=2, ttl=60)
+    memory_cache.set("a", 1)
+    memory_cache.set("b", 2)
+
+    assert memory_cache.get("a") == 1  # "b" is now the least recently used
+    memory_cache.set("c", 3)
+
+    assert memory_cache.get("b") is None
+    assert memory_cache.get("a") == 1
+    assert memory_cache.get("c") == 3
+
+
+def test_memory_cache_clear():
+    memory_cache = MemoryCache(max_entries=2, ttl=60)
+    memory_cache.set("a", 1)
+    memory_cache.clear()
+
+    assert memory_cache.get("a") is None
+
+
+# FileCache
+
+def test_file_cache_round_trip(tmp_path):
+    file_cache = FileCache(str(tmp_path / "cache"))
+
+    assert file_cache.get("a") is None
+    file_cache.set("a", {"query": "crédito", "results": []})
+    assert file_cache.get("a") == {"query": "crédito", "results": []}
+    # Shared by every process using the directory
+    assert FileCache(str(tmp_path / "cache")).get("a") == {"query": "crédito", "results": []}
+
+
+def test_file_cache_ttl(tmp_path, clock):
+    file_cache = FileCache(str(tmp_path), ttl=60)
+    file_cache.set("a", 1)
+
+    clock.now += 60
+    assert file_cache.get("a") == 1
+    clock.now += 1
+    assert file_cache.get("a") is None
+
+
+def test_file_cache_checks_the_stored_key(tmp_path):
+    file_cache = FileCache(str(tmp_path))
+    file_cache.set("a", 1)
+    os.replace(file_cache._path("a"), file_cache._path("b"))
+
+    assert file_cache.get("b") is None
+
+
+def test_file_cache_ignores_corrupt_entries(tmp_path):
+    file_cache = FileCache(str(tmp_path))
+    with open(file_cache._path("a"), "w") as f:
+        f.write('[null, "a", ')
+
+    assert file_cache.get("a") is None
+
+
+def test_file_cache_replaces_entries_atomically(tmp_path, monkeypatch):
+    file_cache = FileCache(str(tmp_path))
+    file_cache.set("a", "old")
+
+    def interrupted_dump(value, f):
+        f.write(json.dumps(value)[:5])
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cache.json, "dump", interrupted_dump)
+    with pytest.raises(OSError):
+        file_cache.set("a", "new")
+
+    # The half-written temporary file never replaced the entry
+    monkeypatch.undo()
+    assert file_cache.get("a") == "old"
+    assert entry_names(tmp_path) == {os.path.basename(file_cache._path("a"))}
+
+
+def test_file_cache_prune_by_entries(tmp_path):
+    file_cache = FileCache(str(tmp_path), max_entries=2)
+    for seconds_ago, key in ((30, "a"), (20, "b"), (10, "c")):
+        file_cache.set(key, key)
+        age(file_cache, key, seconds_ago)
+
+    assert file_cache.get("a") == "a"  # Reading marks it as recently used
+    file_cache.prune()
+
+    assert file_cache.get("b") is None
+    assert file_cache.get("a") == "a" and file_cache.get("c") == "c"
+
+
+def test_file_cache_prune_by_bytes(tmp_path):
+    file_cache = FileCache(str(tmp_path), max_bytes=2500)
+    for seconds_ago, key in ((30, "a"), (20, "b"), (10, "c")):
+        file_cache.set(key, key * 1000)
+        age(file_cache, key, seconds_ago)
+
+    file_cache.prune()
+
+    assert file_cache.get("a") is None
+    assert file_cache.get("b") == "b" * 1000 and file_cache.get("c") == "c" * 1000
+    assert sum(os.path.getsize(tmp_path / name) for name in entry_names(tmp_path)) <= 2500
+
+
+def test_file_cache_prune_by_ttl(tmp_path):
+    file_cache = FileCache(str(tmp_path), ttl=60)
+    file_cache.set("old", 1)
+    age(file_cache, "old", 120)
+    file_cache.set("new", 2)
+
+    file_cache.prune()
+
+    assert entry_names(tmp_path) == {os.path.basename(file_cache._path("new"))}
+
+
+def test_file_cache_prunes_every_few_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileCache, "PRUNE_EVERY", 3)
+    file_cache = FileCache(str(tmp_path), max_entries=1)
+
+    file_cache.set("a", 1)
+    file_cache.set("b", 2)
+    assert len(entry_names(tmp_path)) == 2
+    file_cache.set("c", 3)
+    assert len(entry_names(tmp_path)) == 1
+
+
+def test_file_cache_clear_keeps_other_files(tmp_path):
+    file_cache = FileCache(str(tmp_path))
+    file_cache.set("a", 1)
+    (tmp_path / "README").write_text("not an entry")
+
+    file_cache.clear()
+
+    assert os.listdir(tmp_path) == ["README"]
+
+
+def test_make_cache(tmp_path):
+    assert isinstance(make_cache("memory", 10, 60), MemoryCache)
+    assert isinstance(make_cache("files", 10, 60, str(tmp_path)), FileCache)
+    assert make_cache("none", 10, 60) is None
+    with pytest.raises(ValueError):
+        make_cache("redis", 10, 60)
+
+
+# cache_key
+
+def test_cache_key_normalises_the_query():
+    assert cache_key(1, query="  Crédito   Escolar ", exact_match=False) == cache_key(
+        1, query="crédito escolar", exact_match=False
+    )
+
+
+def test_cache_key_keeps_exact_queries_as_typed():
+    # The raw fallback compares exact queries with original_content as is
+    assert cache_key(1, query="Acta", exact_match=True) != cache_key(1, query="acta", exact_match=True)
+    assert cache_key(1, query="acta  1", exact_match=True) != cache_key(1, query="acta 1", exact_match=True)
+    assert cache_key(1, query="acta", exact_match=True) != cache_key(1, query="acta", exact_match=False)
+
+
+def test_cache_key_parameters():
+    params = dict(query="acta", page=1, start_date=datetime.date(2024, 1, 1).isoformat(), cursor=None)
+
+    assert cache_key(1, **params) == cache_key(1, **dict(reversed(params.items())))
+    assert cache_key(1, **params) != cache_key(2, **params)
+    assert cache_key(1, **params) != cache_key(1, **dict(params, page=2))
+    assert cache_key(1, **params) != cache_key(1, **dict(params, cursor="WzEsIG51bGwsIDVd"))
+    assert cache_key(1, **dict(params, query=None)) != cache_key(1, **dict(params, query=""))
@@ -0,0 +1,83 @@
+import datetime
+
+import pytest
+
+from app.dates import date_windows, extract_date_from_text, find_date
+
+
+@pytest.mark.parametrize("text, expected, confidence", [
+    ("Lima, 5 de marzo de 2024", datetime.date(2024, 3, 5), 1.0),
+    ("RESOLUCIÓN DEL 15 DE AGOSTO DEL 2019", datetime.date(2019, 8, 15), 1.0),
+    ("30 de setiembre de 2021", datetime.date(2021, 9, 30), 1.0),
+    ("30 de septiembre de 2021", datetime.date(2021, 9, 30), 1.0),
+    ("CINCO DE MARZO DEL DOS MIL VEINTICUATRO", datetime.date(2024, 3, 5), 0.9),
+    ("treinta y uno de diciembre de dos mil veinte", datetime.date(2020, 12, 31), 0.9),
+    ("PRIMERO DE ENERO DE DOS MIL UNO", datetime.date(2001, 1, 1), 0.9),
+    # Written with and without accents
+    ("DIECISÉIS DE JUNIO DE DOS MIL VEINTIDÓS", datetime.date(2022, 6, 16), 0.9),
+    ("DIECISEIS DE JUNIO DE DOS MIL VEINTIDOS", datetime.date(2022, 6, 16), 0.9),
+    # Only "DOS MIL": the year is assumed
+    ("1 de enero de dos mil", datetime.date(2000, 1, 1), 0.5),
+    # Line breaks and repeated spaces between the words
+    ("5  de\nmarzo\nde 2024", datetime.date(2024, 3, 5), 1.0),
+])
+def test_find_date(text, expected, confidence):
+    match = find_date(text)
+    assert match.date == expected
+    assert match.confidence == confidence
+    # The span covers the whole date and nothing else
+    assert find_date(text[match.start:match.end]) == (expected, confidence, 0, match.end - match.start)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Sin fecha",
+    "31 de febrero de 2024",  # Impossible dates are skipped
+    "5 de marzo",  # No year
+    "5 de brumario de 2024",
+    "105 de marzo de 2024",
+])
+def test_find_date_without_date(text):
+    assert find_date(text) is None
+    assert extract_date_from_text(text) is None
+
+
+def test_find_date_skips_impossible_date_for_next_one():
+    text = "31 de febrero de 2024, corregido al 29 de febrero de 2024"
+    match = find_date(text)
+    assert match.date == datetime.date(2024, 2, 29)
+    assert text[match.start:match.end] == "29 de febrero de 2024"
+
+
+def test_find_date_prefers_first_date():
+    assert find_date("1 de abril de 2020 y 2 de mayo de 2021").date == datetime.date(2020, 4, 1)
+
+
+def test_find_date_offsets_in_trailing_window():
+    text = "x" * 100 + " Firmado el 9 de julio de 2023"
+    match = find_date(text, leading=10, trailing=30)
+    assert match.date == datetime.date(2023, 7, 9)
+    assert text[match.start:match.end] == "9 de julio de 2023"
+
+
+def test_find_date_ignores_dates_outside_windows():
+    text = "x" * 50 + " 9 de julio de 2023 " + "x" * 50
+    assert find_date(text, leading=20, trailing=20) is None
+    assert find_date(text, leading=0, trailing=0).date == datetime.date(2023, 7, 9)
+
+
+@pytest.mark.parametrize("length, leading, trailing, expected", [
+    # Short texts and disabled windows are searched whole
+    (10, 5, 5, [(0, 10)]),
+    (10, 20, 20, [(0, 10)]),
+    (100, 0, 0, [(0, 100)]),
+    (100, 10, 20, [(0, 10), (80, 20)]),
+    (100, 10, 0, [(0, 10)]),
+    (100, 0, 20, [(80, 20)]),
+])
+def test_date_windows(length, leading, trailing, expected):
+    text = "".join(chr(ord("a") + i % 26) for i in range(length))
+    windows = date_windows(text, leading, trailing)
+    assert [(offset, len(window)) for offset, window in windows] == expected
+    for offset, window in windows:
+        assert text[offset:offset + len(window)] == window
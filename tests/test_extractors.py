@@ -0,0 +1,75 @@
+import fitz
+import pytest
+
+from app import extractors
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    """
+    Three pages: text, blank (a scanned page without a text layer), text.
+    """
+    document = fitz.open()
+    for text in ("primera página", None, "tercera página"):
+        page = document.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    path = tmp_path / "mixed.pdf"
+    document.save(path)
+    return str(path)
+
+
+def stub_ocr(monkeypatch, fn):
+    calls = []
+
+    def extract(document, page_numbers):
+        calls.append(list(page_numbers))
+        return fn(page_numbers)
+
+    monkeypatch.setitem(extractors.EXTRACTORS, "ocr", extract)
+    return calls
+
+
+def test_ocr_only_sees_pages_without_text(pdf, monkeypatch):
+    calls = stub_ocr(monkeypatch, lambda page_numbers: (f"ocr {page_num}" for page_num in page_numbers))
+
+    pages = list(extractors.iter_pages(pdf, "pymupdf,ocr", window=16))
+
+    assert calls == [[1]]
+    assert [page.strip() for page in pages] == ["primera página", "ocr 1", "tercera página"]
+
+
+def test_failing_last_extractor_fails_the_document(pdf, monkeypatch):
+    def fail(page_numbers):
+        raise OSError("tesseract is not installed")
+        yield
+
+    stub_ocr(monkeypatch, fail)
+
+    with pytest.raises(RuntimeError, match=r"pages \[2\]"):
+        list(extractors.iter_pages(pdf, "pymupdf,ocr"))
+
+
+def test_failing_extractor_hands_pages_to_the_next(pdf, monkeypatch):
+    def fail(document, page_numbers):
+        raise ValueError("broken text layer")
+        yield
+
+    monkeypatch.setitem(extractors.EXTRACTORS, "pymupdf", fail)
+    stub_ocr(monkeypatch, lambda page_numbers: ("ocr" for _ in page_numbers))
+
+    assert list(extractors.iter_pages(pdf, "pymupdf,ocr")) == ["ocr", "ocr", "ocr"]
+
+
+def test_process_pdf_marks_partial_extraction_as_error(pdf, monkeypatch):
+    from app.utils import _process_pdf_safely
+
+    def fail(page_numbers):
+        raise OSError("tesseract crashed")
+        yield
+
+    stub_ocr(monkeypatch, fail)
+
+    result, error = _process_pdf_safely(pdf)
+    assert result is None
+    assert "tesseract crashed" in error
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+PDF = b"%PDF-1.4\n" + b"0123456789" * 100 + b"\n%%EOF\n"
+
+
+@pytest.fixture
+def documents(tmp_path, monkeypatch):
+    from app import files
+
+    root = tmp_path / "documents"
+    root.mkdir()
+    (root / "acta 1.pdf").write_bytes(PDF)
+    (root / "folder.pdf").mkdir()
+    (tmp_path / "secret.pdf").write_bytes(b"secret")
+    monkeypatch.setattr(files, "DOCUMENTS_ROOT", os.path.realpath(root))
+    files.path_cache.clear()
+    yield root
+    files.path_cache.clear()
+
+
+@pytest.fixture
+def client(documents):
+    import main
+
+    # No lifespan: the routes under test never touch the database
+    return TestClient(main.app)
+
+
+def test_download(client):
+    response = client.get("/download/acta%201.pdf")
+
+    assert response.status_code == 200
+    assert response.content == PDF
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-length"] == str(len(PDF))
+    assert response.headers["etag"] and response.headers["last-modified"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert response.headers["content-disposition"].startswith("attachment")
+
+
+def test_view_is_inline(client):
+    response = client.get("/view/acta%201.pdf")
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "inline"
+
+
+@pytest.mark.parametrize("validator", ["if-none-match", "if-modified-since"])
+def test_not_modified(client, validator):
+    first = client.get("/view/acta%201.pdf")
+    header = first.headers["etag" if validator == "if-none-match" else "last-modified"]
+
+    response = client.get("/view/acta%201.pdf", headers={validator: header})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+    assert response.headers["cache-control"] == first.headers["cache-control"]
+
+
+def test_stale_etag_gets_the_file(client):
+    response = client.get("/view/acta%201.pdf", headers={"if-none-match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == PDF
+
+
+def test_range_request(client):
+    response = client.get("/view/acta%201.pdf", headers={"range": "bytes=9-18"})
+
+    assert response.status_code == 206
+    assert response.content == PDF[9:19]
+    assert response.headers["content-range"] == f"bytes 9-18/{len(PDF)}"
+
+
+def test_file_replaced_in_place(client, documents):
+    first = client.get("/view/acta%201.pdf")
+
+    replacement = PDF + b"% appended revision\n" * 10
+    (documents / "new.tmp").write_bytes(replacement)
+    os.replace(documents / "new.tmp", documents / "acta 1.pdf")
+    response = client.get("/view/acta%201.pdf")
+
+    assert response.content == replacement
+    assert response.headers["content-length"] == str(len(replacement))
+    assert response.headers["etag"] != first.headers["etag"]
+    # The old validator no longer matches
+    assert client.get("/view/acta%201.pdf", headers={"if-none-match": first.headers["etag"]}).status_code == 200
+
+
+@pytest.mark.parametrize("path", [
+    "/view/missing.pdf",
+    "/view/folder.pdf",
+    # main.py unquotes the name again, so this reaches the app as "../secret.pdf"
+    "/view/..%252Fsecret.pdf",
+    "/download/..%252F..%252Fetc%252Fpasswd",
+])
+def test_not_found(client, path):
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("file_name", ["../secret.pdf", "/etc/passwd", "sub/../../secret.pdf"])
+def test_resolve_document_rejects_paths_outside_root(documents, file_name):
+    from app.files import resolve_document
+
+    with pytest.raises(HTTPException) as error:
+        resolve_document(file_name)
+    assert error.value.status_code == 404
+
+
+def test_missing_file_is_not_cached(client, documents):
+    from app.files import path_cache
+
+    assert client.get("/view/later.pdf").status_code == 404
+    assert path_cache.get("later.pdf") is None
+    (documents / "later.pdf").write_bytes(PDF)
+    assert client.get("/view/later.pdf").status_code == 200
@@ -0,0 +1,275 @@
+import itertools
+import os
+import string
+
+import pytest
+
+# Ingestion against the dedicated test database; every row written here lives
+# under FILE_PREFIX and is removed afterwards
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL environment variable is not set"
+)
+
+FILE_PREFIX = "/tests/ingestion/"
+
+
+@pytest.fixture(scope="module")
+def db():
+    from app.config import SessionLocal
+    from app.migrations import run_migrations
+    from app.models import PDFFile
+
+    run_migrations()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.query(PDFFile).filter(PDFFile.file_path.startswith(FILE_PREFIX)).delete(synchronize_session=False)
+        session.commit()
+        session.close()
+
+
+def distinct_words(count: int) -> str:
+    """
+    Text where every word is a different lexeme: the largest tsvector per character.
+    """
+    words = ("".join(letters) for letters in itertools.product(string.ascii_lowercase, repeat=4))
+    return " ".join(itertools.islice(words, count))
+
+
+def matches(db, file_path: str, word: str) -> bool:
+    from sqlalchemy import func, select
+    from app.models import PDFFile, SEARCH_CONFIG
+
+    return db.execute(
+        select(PDFFile.search_vector.op("@@")(func.to_tsquery(SEARCH_CONFIG, word)))
+        .where(PDFFile.file_path == file_path)
+    ).scalar_one()
+
+
+def test_huge_document_gets_a_bounded_search_vector(db):
+    from app.config import SEARCH_VECTOR_MAX_CHARS
+    from app.utils import insert_pdf_rows
+
+    # Far over PostgreSQL's 1 MB tsvector limit if indexed whole
+    original_content = "convocatoria " + distinct_words(300_000) + " reglamento"
+    assert len(original_content) > 2 * SEARCH_VECTOR_MAX_CHARS
+    file_path = FILE_PREFIX + "huge.pdf"
+
+    insert_pdf_rows(db, [{
+        "file_name": "huge.pdf", "file_path": file_path, "content": "", "original_content": original_content,
+        "document_date": None, "file_size": 1, "file_mtime": 0.0, "content_hash": None,
+    }])
+    db.commit()
+
+    assert matches(db, file_path, "convocatoria")
+    assert not matches(db, file_path, "reglamento")  # Past the indexed prefix
+
+
+def test_migration_backfills_huge_documents(db):
+    from sqlalchemy import update
+    from app.migrations import run_migrations
+    from app.models import PDFFile
+    from app.utils import insert_pdf_rows
+
+    file_path = FILE_PREFIX + "backfill.pdf"
+    insert_pdf_rows(db, [{
+        "file_name": "backfill.pdf", "file_path": file_path, "content": "",
+        "original_content": "convocatoria " + distinct_words(300_000),
+        "document_date": None, "file_size": 1, "file_mtime": 0.0, "content_hash": None,
+    }])
+    # As left by a database from before the search_vector column
+    db.execute(update(PDFFile).where(PDFFile.file_path == file_path).values(search_vector=None))
+    db.commit()
+
+    run_migrations()
+
+    assert matches(db, file_path, "convocatoria")
+
+
+# Incremental runs over a directory of generated PDFs
+
+@pytest.fixture
+def directory(db, tmp_path):
+    from app.models import IngestionRun, PDFFile
+
+    directory = tmp_path / "documents"
+    directory.mkdir()
+    yield directory
+    db.rollback()
+    db.query(PDFFile).filter(PDFFile.file_path.startswith(str(directory))).delete(synchronize_session=False)
+    db.query(IngestionRun).filter(IngestionRun.directory == str(directory)).delete(synchronize_session=False)
+    db.commit()
+
+
+def write_pdf(path, text: str):
+    import fitz
+
+    document = fitz.open()
+    document.new_page().insert_text((72, 72), text)
+    document.save(str(path))
+    document.close()
+
+
+def ingest(directory, **kwargs) -> dict:
+    from app.utils import populate_database_from_pdfs
+
+    return populate_database_from_pdfs(str(directory), workers=1, **kwargs)
+
+
+def counts(summary: dict) -> dict:
+    return {name: summary[name] for name in ("added", "updated", "unchanged", "deleted", "skipped")}
+
+
+def stored(db, directory) -> dict:
+    """
+    {file name: original_content} of the documents indexed from `directory`.
+    """
+    from app.models import PDFFile
+
+    db.expire_all()
+    return dict(
+        db.query(PDFFile.file_name, PDFFile.original_content)
+        .filter(PDFFile.file_path.startswith(str(directory)))
+    )
+
+
+
+def test_incremental_runs(db, directory):
+    from app.models import PDFFile
+
+    for name in ("a", "b", "c"):
+        write_pdf(directory / f"{name}.pdf", f"Convocatoria {name}")
+    first = ingest(directory)
+    assert first["error"] is None and not first["failed"]
+    assert counts(first) == {"added": 3, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+
+    assert counts(ingest(directory)) == {"added": 0, "updated": 0, "unchanged": 3, "deleted": 0, "skipped": 0}
+
+    write_pdf(directory / "a.pdf", "Reglamento modificado de la convocatoria")
+    touched = os.stat(directory / "b.pdf").st_mtime + 100
+    os.utime(directory / "b.pdf", (touched, touched))  # Same bytes, new mtime
+    os.remove(directory / "c.pdf")
+    write_pdf(directory / "d.pdf", "Calendario nuevo")
+    summary = ingest(directory)
+
+    assert counts(summary) == {"added": 1, "updated": 1, "unchanged": 1, "deleted": 1, "skipped": 0}
+    assert stored(db, directory) == {
+        "a.pdf": "Reglamento modificado de la convocatoria", "b.pdf": "Convocatoria b", "d.pdf": "Calendario nuevo",
+    }
+    assert matches(db, str(directory / "a.pdf"), "reglamento")
+    # The touched file is not re-extracted again: its manifest took the new mtime
+    assert db.query(PDFFile.file_mtime).filter(PDFFile.file_path == str(directory / "b.pdf")).scalar() == touched
+    assert counts(ingest(directory)) == {"added": 0, "updated": 0, "unchanged": 3, "deleted": 0, "skipped": 0}
+
+
+def test_empty_directory_is_refused(db, directory):
+    for name in ("a", "b"):
+        write_pdf(directory / f"{name}.pdf", f"Convocatoria {name}")
+    ingest(directory)
+    for name in ("a", "b"):
+        os.remove(directory / f"{name}.pdf")
+
+    summary = ingest(directory)
+
+    assert "No PDFs found" in summary["error"]
+    assert summary["deleted"] == 0
+    assert set(stored(db, directory)) == {"a.pdf", "b.pdf"}
+
+    summary = ingest(directory, allow_empty=True)
+
+    assert summary["error"] is None and summary["deleted"] == 2
+    assert stored(db, directory) == {}
+
+
+def test_missing_directory_is_refused(tmp_path):
+    summary = ingest(tmp_path / "unmounted")
+
+    assert "is not a directory" in summary["error"]
+    assert summary["run_id"] is None
+
+
+# Ingestion runs: per-file status, resume and retry
+
+def run_statuses(db, run_id: int):
+    """
+    :return: ({file name: (status, error)}, run status)
+    """
+    from app.models import IngestionRun, IngestionRunFile
+
+    db.expire_all()
+    files = {
+        os.path.basename(row.file_path): (row.status, row.error)
+        for row in db.query(IngestionRunFile).filter(IngestionRunFile.run_id == run_id)
+    }
+    return files, db.get(IngestionRun, run_id).status
+
+
+def test_failed_files_are_recorded_and_retried(db, directory):
+    write_pdf(directory / "a.pdf", "Convocatoria a")
+    (directory / "broken.pdf").write_bytes(b"not a pdf")
+
+    summary = ingest(directory)
+
+    assert summary["error"] is None and summary["added"] == 1
+    assert list(summary["failed"]) == [str(directory / "broken.pdf")]
+    files, run_status = run_statuses(db, summary["run_id"])
+    assert run_status == "done"
+    assert files["a.pdf"] == ("done", None)
+    assert files["broken.pdf"][0] == "failed" and files["broken.pdf"][1] == summary["failed"][str(directory / "broken.pdf")]
+
+    write_pdf(directory / "broken.pdf", "Convocatoria reparada")
+    # Resuming only takes pending files
+    resumed = ingest(directory, run_id=summary["run_id"])
+    assert resumed["run_id"] == summary["run_id"]
+    assert counts(resumed) == {"added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+    assert run_statuses(db, summary["run_id"])[0]["broken.pdf"][0] == "failed"
+
+    retried = ingest(directory, run_id=summary["run_id"], retry_failed=True)
+
+    assert retried["error"] is None and not retried["failed"]
+    assert counts(retried) == {"added": 1, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+    assert run_statuses(db, summary["run_id"]) == ({"a.pdf": ("done", None), "broken.pdf": ("done", None)}, "done")
+    assert stored(db, directory) == {"a.pdf": "Convocatoria a", "broken.pdf": "Convocatoria reparada"}
+
+
+def test_interrupted_run_resumes_from_its_last_batch(db, directory, monkeypatch):
+    from app import utils
+
+    for name in ("a", "b", "c", "d"):
+        write_pdf(directory / f"{name}.pdf", f"Convocatoria {name}")
+    process = utils._process_pdf_safely
+
+    def crash_on_c(path):
+        if path.endswith("c.pdf"):
+            raise RuntimeError("worker crashed")
+        return process(path)
+
+    monkeypatch.setattr(utils, "_process_pdf_safely", crash_on_c)
+    summary = ingest(directory, batch_size=1)
+
+    assert summary["error"] == "worker crashed"
+    assert summary["added"] == 2  # The batches committed before the crash
+    files, run_status = run_statuses(db, summary["run_id"])
+    assert run_status == "failed"
+    assert files == {
+        "a.pdf": ("done", None), "b.pdf": ("done", None), "c.pdf": ("pending", None), "d.pdf": ("pending", None),
+    }
+    assert set(stored(db, directory)) == {"a.pdf", "b.pdf"}
+
+    monkeypatch.undo()
+    resumed = ingest(directory, run_id=summary["run_id"], batch_size=1)
+
+    assert resumed["error"] is None
+    assert counts(resumed) == {"added": 2, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+    files, run_status = run_statuses(db, summary["run_id"])
+    assert run_status == "done"
+    assert set(files.values()) == {("done", None)}
+    assert set(stored(db, directory)) == {"a.pdf", "b.pdf", "c.pdf", "d.pdf"}
+
+
+def test_unknown_run_cannot_be_resumed(directory):
+    summary = ingest(directory, run_id=2 ** 31 - 1)
+
+    assert "does not exist" in summary["error"]
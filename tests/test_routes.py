@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+# These tests run migrations against a real PostgreSQL database (with pg_trgm
+# available); only a dedicated test database is ever used
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL environment variable is not set"
+)
+
+
+@pytest.fixture(scope="module")
+def db():
+    from app.config import SessionLocal
+    from app.migrations import run_migrations
+
+    run_migrations()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def explain(db, statement) -> str:
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.sql import text
+
+    compiled = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    # Force the planner away from sequential scans so the plan does not depend
+    # on how many rows happen to be in the test database
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    rows = db.execute(text(f"EXPLAIN {compiled}")).fetchall()
+    return "\n".join(row[0] for row in rows)
+
+
+def test_substring_search_uses_trigram_index(db):
+    from sqlalchemy import select
+    from app.models import PDFFile
+    from app.search import substring_filter
+
+    plan = explain(db, select(PDFFile.id).where(substring_filter("convocatoria")))
+
+    assert "Bitmap Index Scan on ix_pdf_files_content_trgm" in plan
+    assert "Bitmap Index Scan on ix_pdf_files_original_content_trgm" in plan
+    assert "Bitmap Index Scan on ix_pdf_files_file_name_trgm" in plan
+
+
+def test_multi_term_search_uses_trigram_index(db):
+    from sqlalchemy import select
+    from app.models import PDFFile
+    from app.search import any_term_filter
+
+    plan = explain(db, select(PDFFile.id).where(any_term_filter(["reglamento", "de", "calendario"])))
+
+    assert "Seq Scan" not in plan
+    assert plan.count("Bitmap Index Scan on ix_pdf_files_content_trgm") == 2
+
+
+def test_autocomplete_uses_vocabulary_prefix_index(db):
+    from app.autocomplete import prefix_query
+
+    plan = explain(db, prefix_query("credit", 5))
+
+    # "Index Scan using ix_vocabulary_term_pattern" or "Bitmap Index Scan on ix_vocabulary_term_pattern"
+    assert "ix_vocabulary_term_pattern" in plan
+    assert "pdf_files" not in plan
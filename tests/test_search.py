@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+from sqlalchemy import Integer, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import REAL
+
+from app.models import PDFFile
+from app.search import analyze_query, decode_cursor, encode_cursor, keyset_filter, websearch_terms
+
+# A ranked expression whose arguments can be rendered as literals
+RANK = func.ts_rank_cd(PDFFile.search_vector, PDFFile.search_vector, type_=REAL)
+
+
+def compiled(expression) -> str:
+    return " ".join(str(expression.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )).split())
+
+
+@pytest.mark.parametrize("rank, document_date, pdf_id", [
+    (0.0607927, datetime.date(2024, 3, 5), 42),
+    (0.1, None, 7),
+    (None, datetime.date(1999, 12, 31), 1),
+    (None, None, 123456),
+])
+def test_cursor_round_trip(rank, document_date, pdf_id):
+    cursor = encode_cursor(rank, document_date, pdf_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (rank, document_date, pdf_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(1.0, None, 1)[:-3], "WzEsMl0"])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_keyset_after_null_date_only_moves_through_null_dates():
+    sql = compiled(keyset_filter(None, encode_cursor(None, None, 5)))
+    assert sql == "pdf_files.document_date IS NULL AND pdf_files.id > 5"
+
+
+def test_keyset_after_date_keeps_earlier_and_null_dates():
+    sql = compiled(keyset_filter(None, encode_cursor(None, datetime.date(2024, 3, 1), 5)))
+    assert sql == (
+        "pdf_files.document_date < '2024-03-01' OR pdf_files.document_date IS NULL"
+        " OR pdf_files.document_date = '2024-03-01' AND pdf_files.id > 5"
+    )
+
+
+def test_keyset_casts_last_rank_to_rank_type():
+    sql = compiled(keyset_filter(RANK, encode_cursor(0.0607927, None, 5)))
+    assert sql.count("CAST(0.0607927 AS REAL)") == 2
+    assert sql.startswith("ts_rank_cd(pdf_files.search_vector, pdf_files.search_vector) < CAST(")
+    assert sql.endswith("AND pdf_files.document_date IS NULL AND pdf_files.id > 5")
+
+
+def test_keyset_uses_rank_type_of_expression():
+    rank = func.length(PDFFile.file_name, type_=Integer)
+    assert "CAST(3 AS INTEGER)" in compiled(keyset_filter(rank, encode_cursor(3, None, 5)))
+
+
+def test_keyset_ignores_rank_missing_from_cursor():
+    # A cursor from an unranked listing applied to a ranked query
+    cursor = encode_cursor(None, None, 5)
+    assert compiled(keyset_filter(RANK, cursor)) == compiled(keyset_filter(None, cursor))
+
+
+@pytest.mark.parametrize("query, stems, raw_terms", [
+    ("convocatorias de la universidad, 2024",
+     ("convocatori", "univers", "2024"), ("convocatorias", "universidad", "2024")),
+    # Stopwords only: nothing to search
+    ("de la", (), ()),
+    ("  ", (), ()),
+    # Punctuation never reaches the ILIKE patterns or the snippets
+    ("¿Reglamento? «académico»", ("reglament", "academ"), ("reglamento", "académico")),
+    ('"calendario" -escolar', ("calendari", "escol"), ("calendario", "escolar")),
+    ("el, la. de;", (), ()),
+    # Duplicates, whatever their case or punctuation, are kept once in order
+    ("Universidad universidad UNIVERSIDAD, becas", ("univers", "bec"), ("universidad", "becas")),
+    # Inner punctuation is part of the raw term
+    ("N° 15-2024", ("n", "15", "2024"), ("n°", "15-2024")),
+])
+def test_analyze_query(analyzer, query, stems, raw_terms):
+    assert analyze_query(query) == (stems, raw_terms)
+
+
+@pytest.mark.parametrize("query, words", [
+    ("becas escolares", "becas escolares"),
+    ('"calendario escolar" -feriado', '"calendario escolar"'),
+    ("becas or créditos OR ayudas", "becas créditos ayudas"),
+    ("-feriado", ""),
+])
+def test_websearch_terms(query, words):
+    assert websearch_terms(query) == words
@@ -0,0 +1,41 @@
+import pytest
+
+from app.snippets import MAX_MATCHES, find_analyzed_matches, find_matches, highlight
+
+
+@pytest.mark.parametrize("source, terms, expected", [
+    ("Se publica la CONVOCATORIA.", ["convocatoria"], [(14, 26)]),
+    ("Resolución del Consejo", ["resolucion"], [(0, 10)]),
+    ("Año académico", ["ano", "academico"], [(0, 3), (4, 13)]),
+    # Lowercasing "İ" adds a character; offsets must still point into the source
+    ("İ Se publica la CONVOCATORIA.", ["convocatoria"], [(16, 28)]),
+    # The longer term wins over its own prefix
+    ("convocatorias abiertas", ["convoca", "convocatorias"], [(0, 13)]),
+    ("sin coincidencias", ["xyz"], []),
+])
+def test_find_matches(source, terms, expected):
+    assert find_matches(source, terms) == expected
+
+
+def test_find_analyzed_matches_is_exact_on_analysed_text():
+    content = "resolu consej universid resolu"
+    assert find_analyzed_matches(content, ["resolu", "consej"]) == [(0, 6), (7, 13), (24, 30)]
+    assert find_analyzed_matches(content, [""]) == []
+
+
+def test_matches_are_capped():
+    source = "ab " * (MAX_MATCHES * 2)
+    assert len(find_matches(source, ["ab"])) == MAX_MATCHES
+    assert len(find_analyzed_matches(source, ["ab"])) == MAX_MATCHES
+
+
+def test_highlight_centres_the_densest_cluster():
+    source = "convocatoria " + "x" * 500 + " plazo de la convocatoria y plazo final"
+    snippet, highlights = highlight(source, ["convocatoria", "plazo"], width=60)
+    assert "plazo de la convocatoria y plazo" in snippet
+    assert [snippet[start:end].lower() for start, end in highlights] == ["plazo", "convocatoria", "plazo"]
+
+
+def test_highlight_without_match():
+    assert highlight("", ["a"]) is None
+    assert highlight("texto", ["otro"]) is None
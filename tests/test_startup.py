@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+# Cumulative `import main` time allowed for an API worker, in seconds
+IMPORT_TIME_BUDGET = 3.0
+
+# Ingestion-only libraries the API must never import
+INGESTION_MODULES = ("fitz", "pytesseract", "pdfminer", "PIL", "nltk", "pdf2image")
+
+
+def test_api_import_time_within_budget():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Importing main must not need a database; the URL is never connected to
+    env = dict(os.environ, DATABASE_URL="postgresql://docusearch@localhost/docusearch_import_time")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=root, env=env, capture_output=True, text=True, check=True,
+    )
+    # Lines look like "import time: self [us] | cumulative | module"
+    imports = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                imports[module.strip()] = int(cumulative)
+
+    loaded = sorted(name for name in imports if name.split(".")[0] in INGESTION_MODULES)
+    assert not loaded, f"API imports ingestion libraries: {loaded}"
+    assert imports["main"] / 1e6 < IMPORT_TIME_BUDGET